@@ -1,7 +1,8 @@
 from django.contrib import admin
 
-from backend.models import (BotUser, BotUserFilter, Chapter, Project,
-                            TaskManager, Template)
+from backend.models import (ArchivedProject, BotUser, BotUserFilter, Chapter,
+                            Delivery, MediaFile, Project, TaskManager,
+                            Template)
 
 
 @admin.register(BotUser)
@@ -27,9 +28,29 @@ class ChapterAdmin(admin.ModelAdmin):
 
 @admin.register(TaskManager)
 class TaskManagerAdmin(admin.ModelAdmin):
-    list_display = ['id', 'type', 'project', 'done']
+    list_display = ['id', 'type', 'project', 'done', 'attempts', 'owner',
+                    'lease_expires']
 
 
 @admin.register(Template)
 class TemplateAdmin(admin.ModelAdmin):
     list_display = ['id', 'type', 'title']
+
+
+@admin.register(Delivery)
+class DeliveryAdmin(admin.ModelAdmin):
+    list_display = ['id', 'project', 'chat_id', 'status', 'attempts',
+                    'updated']
+    list_filter = ['status']
+
+
+@admin.register(MediaFile)
+class MediaFileAdmin(admin.ModelAdmin):
+    list_display = ['id', 'path', 'file_id', 'updated']
+
+
+@admin.register(ArchivedProject)
+class ArchivedProjectAdmin(admin.ModelAdmin):
+    list_display = ['id', 'article', 'title', 'budget', 'published',
+                    'partition']
+    search_fields = ['title']
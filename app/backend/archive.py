@@ -0,0 +1,131 @@
+import gzip
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from backend.chapters import chapter_registry
+from backend.models import ArchivedProject, Project, TaskManager
+
+
+ARCHIVE_BATCH_SIZE = 500
+
+
+def get_partition(published) -> str:
+    return timezone.localtime(published).strftime('%Y-%m')
+
+
+def get_partition_path(partition) -> Path:
+    return Path(settings.ARCHIVE_DIR) / f'projects-{partition}.jsonl.gz'
+
+
+def to_record(project: Project, chapter_ids) -> dict:
+    deadline = project.deadline and project.deadline.isoformat()
+    return {
+        'article': project.article,
+        'title': project.title,
+        'description': project.description,
+        'budget': project.budget,
+        'deadline': deadline,
+        'safe_deal': project.safe_deal,
+        'without_executor': project.without_executor,
+        'chapters': [chapter_registry.get(chapter_id).name
+                     for chapter_id in chapter_ids],
+        'published': project.published.isoformat(),
+        'url': project.url,
+    }
+
+
+def write_records(partition, records):
+    path = get_partition_path(partition)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Every call appends a new gzip member, gzip reads them as one stream.
+    with gzip.open(path, 'at', encoding='utf-8') as file:
+        for record in records:
+            file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def read_partition(partition):
+    path = get_partition_path(partition)
+    if not path.exists():
+        return
+
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        for line in file:
+            yield json.loads(line)
+
+
+def read_record(partition, article):
+    # A batch interrupted before its projects were deleted is written
+    # again on the next run, the last copy wins.
+    found = None
+    for record in read_partition(partition):
+        if record['article'] == article:
+            found = record
+
+    return found
+
+
+def get_archivable_projects(before):
+    unfinished_tasks = TaskManager.tasks.filter(
+        project=OuterRef('pk'),
+        done=False,
+    )
+    return Project.projects.filter(
+        ~Exists(unfinished_tasks),
+        published__lt=before,
+    ).order_by('published', 'id')
+
+
+def archive_batch(projects: list[Project]):
+    project_ids = [project.id for project in projects]
+    chapter_ids = {}
+    ProjectChapter = Project.chapters.through
+    for project_id, chapter_id in ProjectChapter.objects.filter(
+        project_id__in=project_ids,
+    ).values_list('project_id', 'chapter_id'):
+        chapter_ids.setdefault(project_id, []).append(chapter_id)
+
+    partitions = {}
+    for project in projects:
+        record = to_record(project, chapter_ids.get(project.id, []))
+        partition = get_partition(project.published)
+        partitions.setdefault(partition, []).append(record)
+
+    for partition, records in partitions.items():
+        write_records(partition, records)
+
+    with transaction.atomic():
+        ArchivedProject.projects.bulk_create([
+            ArchivedProject(
+                article=project.article,
+                title=project.title,
+                budget=project.budget,
+                published=project.published,
+                url=project.url,
+                partition=get_partition(project.published),
+            )
+            for project in projects
+        ], ignore_conflicts=True)
+        Project.projects.filter(id__in=project_ids).delete()
+
+
+def archive_projects(before, batch_size=ARCHIVE_BATCH_SIZE) -> int:
+    archived = 0
+    projects = get_archivable_projects(before)
+    while (batch := list(projects[:batch_size])):
+        archive_batch(batch)
+        archived += len(batch)
+
+    return archived
+
+
+def delete_done_tasks(before) -> int:
+    deleted, _ = TaskManager.tasks.filter(
+        done=True,
+        when__lt=before,
+    ).delete()
+    return deleted
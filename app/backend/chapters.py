@@ -0,0 +1,74 @@
+import threading
+import time
+
+from backend.models import Chapter
+
+
+REGISTRY_TTL = 60
+
+
+class ChapterRegistry():
+    def __init__(self, ttl=REGISTRY_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.loaded = None
+        self.by_id = {}
+        self.by_name = {}
+        self.children = {}
+
+    def invalidate(self):
+        self.loaded = None
+
+    def load(self):
+        with self.lock:
+            by_id, by_name, children = {}, {}, {}
+            for chapter in Chapter.chapters.all():
+                by_id[chapter.id] = chapter
+                by_name[chapter.parent_id, chapter.name] = chapter
+                children.setdefault(chapter.parent_id, []).append(chapter)
+
+            self.by_id, self.by_name = by_id, by_name
+            self.children = children
+            self.loaded = time.monotonic()
+
+    def ensure_loaded(self):
+        loaded = self.loaded
+        if loaded is None or time.monotonic() - loaded > self.ttl:
+            self.load()
+
+    def get(self, chapter_id) -> Chapter:
+        self.ensure_loaded()
+        if chapter_id not in self.by_id:
+            self.load()
+
+        return self.by_id.get(chapter_id)
+
+    def get_by_name(self, name, parent_id=None) -> Chapter:
+        self.ensure_loaded()
+        return self.by_name.get((parent_id, name))
+
+    def get_parent(self, chapter_id) -> Chapter:
+        if (chapter := self.get(chapter_id)) and chapter.parent_id:
+            return self.get(chapter.parent_id)
+
+    def get_roots(self) -> list[Chapter]:
+        self.ensure_loaded()
+        return self.children.get(None, [])
+
+    def get_children(self, chapter_id) -> list[Chapter]:
+        self.ensure_loaded()
+        return self.children.get(chapter_id, [])
+
+    def get_or_create(self, parent_name, name) -> Chapter:
+        if not (parent := self.get_by_name(parent_name)):
+            parent, _ = Chapter.chapters.get_or_create(name=parent_name,
+                                                       parent=None)
+
+        if not (chapter := self.get_by_name(name, parent.id)):
+            chapter, _ = Chapter.chapters.get_or_create(name=name,
+                                                        parent=parent)
+
+        return chapter
+
+
+chapter_registry = ChapterRegistry()
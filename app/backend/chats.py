@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict
+
+from backend.models import BotUser, BotUserFilter
+
+
+CHAT_CACHE_SIZE = 10000
+CHAT_CACHE_TTL = 5 * 60
+
+
+class ChatState():
+    def __init__(self, user: BotUser, chapter_ids: set[int]):
+        self.user = user
+        self.chapter_ids = chapter_ids
+        self.loaded = time.monotonic()
+
+    @property
+    def filter(self) -> BotUserFilter:
+        return self.user.filter
+
+
+# Per-chat BotUser, its filter and selected chapter ids for the bot
+# handlers. The cache is per process: a cached state is used only while
+# the `updated` columns of the user and the filter match the database, so
+# edits made elsewhere (admin, another bot process) are picked up. That
+# one small read per button press is deliberate, it replaces three. A
+# press checks the state once and hands it on to the menus it re-renders,
+# and handlers save only the fields they change, in one transaction.
+class ChatCache():
+    def __init__(self, size=CHAT_CACHE_SIZE, ttl=CHAT_CACHE_TTL):
+        self.size = size
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.states = OrderedDict()
+        self.chat_ids = {}
+
+    def load(self, chat_id) -> ChatState:
+        user, _ = BotUser.users.select_related('filter').get_or_create(
+            chat_id=chat_id,
+        )
+        chapter_ids = set(user.filter.chapters.values_list('id', flat=True))
+        return ChatState(user, chapter_ids)
+
+    def is_current(self, state: ChatState) -> bool:
+        version = BotUser.users.filter(id=state.user.id).values_list(
+            'updated', 'filter__updated',
+        ).first()
+        return version == (state.user.updated, state.filter.updated)
+
+    def get(self, chat_id) -> ChatState:
+        with self.lock:
+            state = self.states.get(chat_id)
+        if (state and time.monotonic() - state.loaded < self.ttl and
+                self.is_current(state)):
+            with self.lock:
+                if chat_id in self.states:
+                    self.states.move_to_end(chat_id)
+            return state
+
+        state = self.load(chat_id)
+        with self.lock:
+            self.states[chat_id] = state
+            self.states.move_to_end(chat_id)
+            self.chat_ids[state.user.id] = chat_id
+            while len(self.states) > self.size:
+                _, evicted = self.states.popitem(last=False)
+                self.chat_ids.pop(evicted.user.id, None)
+
+        return state
+
+    def get_user(self, chat_id) -> BotUser:
+        return self.get(chat_id).user
+
+    def get_by_user_id(self, user_id) -> ChatState:
+        with self.lock:
+            if (chat_id := self.chat_ids.get(user_id)) is not None:
+                return self.states.get(chat_id)
+
+    def invalidate(self, user_id=None):
+        with self.lock:
+            if user_id is None:
+                self.states.clear()
+                self.chat_ids.clear()
+            elif (chat_id := self.chat_ids.pop(user_id, None)) is not None:
+                self.states.pop(chat_id, None)
+
+    def user_saved(self, user: BotUser):
+        state = self.get_by_user_id(user.id)
+        if state and state.user is not user:
+            self.invalidate(user.id)
+
+    def filter_saved(self, user_filter: BotUserFilter):
+        state = self.get_by_user_id(user_filter.user_id)
+        if state and state.filter is not user_filter:
+            self.invalidate(user_filter.user_id)
+
+    def chapters_changed(self, user_filter: BotUserFilter, action, pk_set,
+                         updated):
+        state = self.get_by_user_id(user_filter.user_id)
+        if state is None:
+            return
+
+        if action == 'post_add':
+            state.chapter_ids |= pk_set
+        elif action == 'post_remove':
+            state.chapter_ids -= pk_set
+        elif action == 'post_clear':
+            state.chapter_ids.clear()
+        state.filter.updated = updated
+
+
+chat_cache = ChatCache()
@@ -0,0 +1,94 @@
+import re
+
+
+KEYWORDS_SEP = re.compile(r'[,;\n]+')
+
+
+def normalize(text: str) -> str:
+    return text.casefold().replace('ё', 'е')
+
+
+def split_keywords(keywords: str) -> list[str]:
+    result = []
+    for keyword in KEYWORDS_SEP.split(keywords or ''):
+        keyword = ' '.join(keyword.split())
+        if keyword and keyword not in result:
+            result.append(keyword)
+
+    return result
+
+
+def parse_keywords(keywords: str) -> list[str]:
+    result = []
+    for keyword in split_keywords(keywords):
+        keyword = normalize(keyword)
+        if keyword not in result:
+            result.append(keyword)
+
+    return result
+
+
+# Aho–Corasick automaton over normalized keywords. A keyword matches at
+# the start of a word, so "бот" finds "боты" and "бота" but not "работа".
+class KeywordAutomaton():
+    def __init__(self, keywords):
+        self.keywords = tuple(keywords)
+        self.ids = {keyword: keyword_id
+                    for keyword_id, keyword in enumerate(self.keywords)}
+        self.goto = [{}]
+        self.fail = [0]
+        # outputs[state] is a tuple of (keyword length, keyword id)
+        self.outputs = [()]
+
+        for keyword_id, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append(())
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.outputs[state] += ((len(keyword), keyword_id),)
+
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for char, next_state in self.goto[state].items():
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[next_state] = self.goto[fail].get(char, 0)
+                self.outputs[next_state] += \
+                    self.outputs[self.fail[next_state]]
+                queue.append(next_state)
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def search(self, text: str) -> set[int]:
+        # Keywords have their whitespace collapsed by split_keywords, so
+        # the text is collapsed the same way.
+        text = ' '.join(normalize(text).split())
+        found = set()
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for length, keyword_id in self.outputs[state]:
+                start = position - length + 1
+                if start == 0 or not text[start - 1].isalnum():
+                    found.add(keyword_id)
+
+        return found
+
+
+def contains_keywords(keywords: str, text: str) -> bool:
+    if not (keywords := parse_keywords(keywords)):
+        return True
+
+    return bool(KeywordAutomaton(keywords).search(text))
+
+
+def get_project_text(project) -> str:
+    return f'{project.title}\n{project.description}'
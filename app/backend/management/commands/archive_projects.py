@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from backend.archive import (archive_projects, delete_done_tasks,
+                             ARCHIVE_BATCH_SIZE)
+
+
+class Command(BaseCommand):
+    help = ('Moves projects older than --days to gzip JSONL partitions in '
+            'ARCHIVE_DIR and deletes done tasks. Meant to run daily from '
+            'cron.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            default=settings.ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int,
+                            default=ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--vacuum', action='store_true',
+                            help='Reclaim the freed space (SQLite only)')
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timezone.timedelta(days=options['days'])
+        archived = archive_projects(before, options['batch_size'])
+        deleted = delete_done_tasks(before)
+        self.stdout.write(f'{archived} projects archived, '
+                          f'{deleted} done tasks deleted')
+
+        if options['vacuum'] and connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('VACUUM')
@@ -0,0 +1,170 @@
+import bisect
+import threading
+
+from django.db.models import Count, Max
+
+from backend.keywords import (get_project_text, KeywordAutomaton,
+                              parse_keywords)
+from backend.models import BotUserFilter, Project
+
+
+BUDGET_MAX = 10**9
+
+
+def iter_bits(mask: int):
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
+
+
+class SubscriptionIndex():
+    def __init__(self, filters, filter_chapters, automaton=None):
+        self.automaton = automaton or KeywordAutomaton([])
+        self.keyword_masks = [0] * len(self.automaton)
+        self.any_keyword_mask = 0
+        self.chat_ids = []
+        self.all_mask = 0
+        self.any_chapter_mask = 0
+        self.chapter_masks = {}
+        self.safe_deal_mask = 0
+        self.without_executor_mask = 0
+
+        bits = {}
+        budget_mins, budget_maxs = [], []
+        for (filter_id, chat_id, budget_min, budget_max,
+                safe_deal, without_executor, keywords) in filters:
+            bit = len(self.chat_ids)
+            bits[filter_id] = bit
+            self.chat_ids.append(chat_id)
+            self.all_mask |= 1 << bit
+            if safe_deal:
+                self.safe_deal_mask |= 1 << bit
+            if without_executor:
+                self.without_executor_mask |= 1 << bit
+
+            if (keywords := parse_keywords(keywords)):
+                for keyword in keywords:
+                    keyword_id = self.automaton.ids[keyword]
+                    self.keyword_masks[keyword_id] |= 1 << bit
+            else:
+                self.any_keyword_mask |= 1 << bit
+
+            budget_mins.append((budget_min or 0, bit))
+            budget_maxs.append((budget_max or BUDGET_MAX, bit))
+
+        chaptered_mask = 0
+        for filter_id, chapter_id in filter_chapters:
+            if (bit := bits.get(filter_id)) is None:
+                continue
+
+            self.chapter_masks[chapter_id] = \
+                self.chapter_masks.get(chapter_id, 0) | 1 << bit
+            chaptered_mask |= 1 << bit
+
+        self.any_chapter_mask = self.all_mask & ~chaptered_mask
+
+        # min_masks[i] holds users whose budget_min is among the first i
+        # sorted values, max_masks[i] users whose budget_max is among the
+        # values from i on.
+        budget_mins.sort()
+        self.budget_min_values = [value for value, _ in budget_mins]
+        self.budget_min_masks = [0]
+        for _, bit in budget_mins:
+            self.budget_min_masks.append(self.budget_min_masks[-1] | 1 << bit)
+
+        budget_maxs.sort()
+        self.budget_max_values = [value for value, _ in budget_maxs]
+        self.budget_max_masks = [0]
+        for _, bit in reversed(budget_maxs):
+            self.budget_max_masks.append(self.budget_max_masks[-1] | 1 << bit)
+        self.budget_max_masks.reverse()
+
+    def match(self, budget, safe_deal, without_executor,
+              chapter_ids, text='') -> list[int]:
+        mask = self.all_mask
+        if budget:
+            index = bisect.bisect_right(self.budget_min_values, budget)
+            mask &= self.budget_min_masks[index]
+            index = bisect.bisect_left(self.budget_max_values, budget)
+            mask &= self.budget_max_masks[index]
+
+        if not safe_deal:
+            mask &= ~self.safe_deal_mask
+
+        if not without_executor:
+            mask &= ~self.without_executor_mask
+
+        chapters_mask = self.any_chapter_mask
+        for chapter_id in chapter_ids:
+            chapters_mask |= self.chapter_masks.get(chapter_id, 0)
+        mask &= chapters_mask
+
+        if mask & ~self.any_keyword_mask:
+            keywords_mask = self.any_keyword_mask
+            for keyword_id in self.automaton.search(text):
+                keywords_mask |= self.keyword_masks[keyword_id]
+            mask &= keywords_mask
+
+        return [self.chat_ids[bit] for bit in iter_bits(mask)]
+
+
+class SubscriptionMatcher():
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.index = None
+        self.version = None
+        self.automaton = None
+
+    def invalidate(self):
+        self.version = None
+
+    def get_version(self):
+        version = BotUserFilter.objects.aggregate(
+            updated=Max('updated'),
+            count=Count('id'),
+        )
+        return version['updated'], version['count']
+
+    def build(self) -> SubscriptionIndex:
+        active_filters = BotUserFilter.objects.filter(active=True)
+        filters = active_filters.values_list(
+            'id', 'user__chat_id', 'budget_min', 'budget_max',
+            'safe_deal', 'without_executor', 'keywords',
+        )
+        filter_chapters = BotUserFilter.chapters.through.objects.filter(
+            botuserfilter__active=True,
+        ).values_list('botuserfilter_id', 'chapter_id')
+        # The automaton is rebuilt only when the set of keywords changes,
+        # budget or chapter edits just remap the masks.
+        keywords = set()
+        for *_, user_keywords in filters:
+            keywords.update(parse_keywords(user_keywords))
+        if self.automaton is None or \
+                set(self.automaton.keywords) != keywords:
+            self.automaton = KeywordAutomaton(sorted(keywords))
+
+        return SubscriptionIndex(filters, filter_chapters, self.automaton)
+
+    def refresh(self) -> SubscriptionIndex:
+        with self.lock:
+            version = self.get_version()
+            if self.index is None or version != self.version:
+                self.index = self.build()
+                self.version = version
+
+            return self.index
+
+    def match(self, project: Project) -> list[int]:
+        index = self.refresh()
+        chapter_ids = project.chapters.values_list('id', flat=True)
+        return index.match(
+            budget=project.budget,
+            safe_deal=project.safe_deal,
+            without_executor=project.without_executor,
+            chapter_ids=chapter_ids,
+            text=get_project_text(project),
+        )
+
+
+subscription_matcher = SubscriptionMatcher()
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 12:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0012_auto_20210921_1753'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='botuserfilter',
+            name='updated',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
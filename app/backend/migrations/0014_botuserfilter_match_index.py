@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-18 12:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0013_botuserfilter_updated'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='botuserfilter',
+            index=models.Index(fields=['active', 'budget_min', 'budget_max'], name='backend_filter_match_idx'),
+        ),
+    ]
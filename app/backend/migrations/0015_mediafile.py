@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-18 12:24
+
+from django.db import migrations, models
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0014_botuserfilter_match_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=255, unique=True)),
+                ('digest', models.CharField(max_length=40)),
+                ('file_id', models.CharField(max_length=255)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            managers=[
+                ('files', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2 on 2026-10-18 12:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0015_mediafile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskmanager',
+            name='attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='taskmanager',
+            name='last_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='taskmanager',
+            name='lease_expires',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='taskmanager',
+            name='owner',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
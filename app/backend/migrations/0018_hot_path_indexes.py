@@ -0,0 +1,26 @@
+# Generated by Django 3.2 on 2026-10-18 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0017_delivery'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='project',
+            name='published',
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='taskmanager',
+            index=models.Index(fields=['done', 'when'], name='backend_task_due_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='chapter',
+            constraint=models.UniqueConstraint(fields=('name', 'parent'), name='backend_chapter_unique'),
+        ),
+    ]
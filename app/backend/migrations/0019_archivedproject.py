@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:30
+
+from django.db import migrations, models
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0018_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedProject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('article', models.IntegerField(unique=True)),
+                ('title', models.CharField(db_index=True, max_length=255)),
+                ('budget', models.IntegerField(null=True)),
+                ('published', models.DateTimeField(db_index=True)),
+                ('url', models.URLField()),
+                ('partition', models.CharField(max_length=7)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            managers=[
+                ('projects', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
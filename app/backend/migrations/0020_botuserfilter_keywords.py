@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0019_archivedproject'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='botuserfilter',
+            name='keywords',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
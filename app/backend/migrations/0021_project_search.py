@@ -0,0 +1,73 @@
+from django.db import migrations
+
+
+# External content FTS5 index over backend_project, kept in sync by
+# triggers so bulk_create and queryset deletes are indexed too.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE backend_project_fts USING fts5(
+        title,
+        description,
+        content='backend_project',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER backend_project_fts_insert
+    AFTER INSERT ON backend_project BEGIN
+        INSERT INTO backend_project_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER backend_project_fts_delete
+    AFTER DELETE ON backend_project BEGIN
+        INSERT INTO backend_project_fts(backend_project_fts, rowid, title,
+                                        description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER backend_project_fts_update
+    AFTER UPDATE OF title, description ON backend_project BEGIN
+        INSERT INTO backend_project_fts(backend_project_fts, rowid, title,
+                                        description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO backend_project_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    INSERT INTO backend_project_fts(backend_project_fts) VALUES ('rebuild')
+    """,
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS backend_project_fts_insert',
+    'DROP TRIGGER IF EXISTS backend_project_fts_delete',
+    'DROP TRIGGER IF EXISTS backend_project_fts_update',
+    'DROP TABLE IF EXISTS backend_project_fts',
+]
+
+
+def run_sql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0020_botuserfilter_keywords'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sql(CREATE_SQL), run_sql(DROP_SQL)),
+    ]
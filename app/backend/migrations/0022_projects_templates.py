@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+TEMPLATES = [
+    ('Message', 'NO_PROJECTS', '<b>🔍 Проектов не найдено</b>'),
+    ('Smile', 'PREVIOUS', '⬅️'),
+    ('Smile', 'NEXT', '➡️'),
+]
+
+
+def create_templates(apps, schema_editor):
+    Template = apps.get_model('backend', 'Template')
+    for type, title, body_ru in TEMPLATES:
+        Template._default_manager.get_or_create(
+            type=type,
+            title=title,
+            defaults={'body_ru': body_ru},
+        )
+
+
+def delete_templates(apps, schema_editor):
+    Template = apps.get_model('backend', 'Template')
+    for type, title, _ in TEMPLATES:
+        Template._default_manager.filter(type=type, title=title).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0021_project_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_templates, delete_templates),
+    ]
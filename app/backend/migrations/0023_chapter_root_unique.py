@@ -0,0 +1,70 @@
+from django.db import migrations, models
+
+
+CHAPTER_RELATIONS = [
+    ('Project', 'project_id'),
+    ('BotUserFilter', 'botuserfilter_id'),
+]
+
+
+def merge_chapter(apps, chapter, into):
+    Chapter = apps.get_model('backend', 'Chapter')
+    children = Chapter._default_manager.filter(parent_id=chapter.id)
+    for child in children:
+        same = Chapter._default_manager.filter(
+            parent_id=into.id,
+            name=child.name,
+        ).first()
+        if same:
+            merge_chapter(apps, child, same)
+        else:
+            Chapter._default_manager.filter(id=child.id).update(
+                parent_id=into.id,
+            )
+
+    for model_name, owner_field in CHAPTER_RELATIONS:
+        Through = apps.get_model('backend', model_name).chapters.through
+        linked = set(Through.objects.filter(
+            chapter_id=into.id,
+        ).values_list(owner_field, flat=True))
+        rows = Through.objects.filter(chapter_id=chapter.id)
+        Through.objects.bulk_create([
+            Through(**{owner_field: owner_id, 'chapter_id': into.id})
+            for owner_id in rows.values_list(owner_field, flat=True)
+            if owner_id not in linked
+        ])
+        rows.delete()
+
+    chapter.delete()
+
+
+def merge_duplicate_roots(apps, schema_editor):
+    Chapter = apps.get_model('backend', 'Chapter')
+    roots = {}
+    for root in Chapter._default_manager.filter(
+        parent__isnull=True,
+    ).order_by('id'):
+        if root.name in roots:
+            merge_chapter(apps, root, roots[root.name])
+        else:
+            roots[root.name] = root
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0022_projects_templates'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_roots,
+                             migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='chapter',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(parent__isnull=True),
+                fields=('name',),
+                name='backend_chapter_root_unique',
+            ),
+        ),
+    ]
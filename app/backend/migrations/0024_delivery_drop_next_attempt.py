@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0023_chapter_root_unique'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='delivery',
+            name='backend_delivery_status_idx',
+        ),
+        migrations.RemoveField(
+            model_name='delivery',
+            name='next_attempt',
+        ),
+        migrations.AddIndex(
+            model_name='delivery',
+            index=models.Index(fields=['project', 'status'], name='backend_delivery_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 13:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0024_delivery_drop_next_attempt'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedproject',
+            name='title',
+            field=models.CharField(max_length=255),
+        ),
+    ]
@@ -1,6 +1,10 @@
 from django.db import models
+from django.db.models import Exists, F, OuterRef, Q
 from django.utils import timezone
 
+from backend.keywords import (contains_keywords, get_project_text,
+                              KeywordAutomaton, parse_keywords)
+
 
 def chapter_to_tag(text):
     new_text = str()
@@ -29,6 +33,18 @@ class Chapter(models.Model):
 
     class Meta:
         ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'parent'],
+                name='backend_chapter_unique',
+            ),
+            # NULL parents are distinct for the constraint above
+            models.UniqueConstraint(
+                fields=['name'],
+                condition=Q(parent__isnull=True),
+                name='backend_chapter_root_unique',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -44,7 +60,7 @@ class Project(models.Model):
     safe_deal = models.BooleanField(default=False)
     without_executor = models.BooleanField(default=False)
     chapters = models.ManyToManyField(Chapter)
-    published = models.DateTimeField()
+    published = models.DateTimeField(db_index=True)
     url = models.URLField()
 
     created = models.DateTimeField(auto_now_add=True)
@@ -76,12 +92,15 @@ class Project(models.Model):
             return 'по договоренности'
 
     def get_chapters_info(self):
+        from backend.chapters import chapter_registry
+
         chapters_info = str()
-        for chapter in self.chapters.all():
+        for chapter_id in self.chapters.values_list('id', flat=True):
+            chapter = chapter_registry.get(chapter_id)
             chapter_info = '#' + chapter_to_tag(chapter.name)
             chapters_info += chapter_info + ' '
-            if chapter.parent:
-                parent_info = '#' + chapter_to_tag(chapter.parent.name)
+            if (parent := chapter_registry.get_parent(chapter_id)):
+                parent_info = '#' + chapter_to_tag(parent.name)
                 chapters_info += parent_info + ' '
 
         return chapters_info
@@ -90,6 +109,26 @@ class Project(models.Model):
         return self.title
 
 
+class ArchivedProject(models.Model):
+    projects = models.Manager()
+    article = models.IntegerField(unique=True)
+    title = models.CharField(max_length=255)
+    budget = models.IntegerField(null=True)
+    published = models.DateTimeField(db_index=True)
+    url = models.URLField()
+    partition = models.CharField(max_length=7)
+
+    created = models.DateTimeField(auto_now_add=True)
+
+    def get_record(self):
+        from backend.archive import read_record
+
+        return read_record(self.partition, self.article)
+
+    def __str__(self):
+        return self.title
+
+
 class BotUser(models.Model):
     class State(models.IntegerChoices):
         EDIT_BUDGET_MIN = 1
@@ -111,7 +150,54 @@ class BotUser(models.Model):
         return str(self.chat_id)
 
 
+class BotUserFilterManager(models.Manager):
+    def matching(self, project: Project):
+        filters = self.filter(active=True)
+        if (budget := project.budget):
+            filters = filters.filter(
+                Q(budget_min__isnull=True) | Q(budget_min__lte=budget),
+                Q(budget_max__isnull=True) | Q(budget_max=0) |
+                Q(budget_max__gte=budget),
+            )
+
+        if not project.safe_deal:
+            filters = filters.filter(safe_deal=False)
+
+        if not project.without_executor:
+            filters = filters.filter(without_executor=False)
+
+        FilterChapter = self.model.chapters.through
+        ProjectChapter = Project.chapters.through
+        project_chapter_ids = ProjectChapter.objects.filter(
+            project_id=project.id,
+        ).values('chapter_id')
+        has_chapters = Exists(FilterChapter.objects.filter(
+            botuserfilter_id=OuterRef('pk'),
+        ))
+        has_project_chapters = Exists(FilterChapter.objects.filter(
+            botuserfilter_id=OuterRef('pk'),
+            chapter_id__in=project_chapter_ids,
+        ))
+        filters = filters.filter(~has_chapters | has_project_chapters)
+
+        # Keywords are checked in Python over the remaining candidates
+        candidates = [
+            (chat_id, parse_keywords(keywords)) for chat_id, keywords in
+            filters.values_list('user__chat_id', 'keywords')
+        ]
+        automaton = KeywordAutomaton(sorted({
+            keyword for _, keywords in candidates for keyword in keywords
+        }))
+        found = {automaton.keywords[keyword_id] for keyword_id in
+                 automaton.search(get_project_text(project))}
+        return [
+            chat_id for chat_id, keywords in candidates
+            if not keywords or not found.isdisjoint(keywords)
+        ]
+
+
 class BotUserFilter(models.Model):
+    objects = BotUserFilterManager()
     user = models.OneToOneField(
         to=BotUser,
         on_delete=models.CASCADE,
@@ -121,10 +207,20 @@ class BotUserFilter(models.Model):
     budget_min = models.IntegerField(null=True, blank=True)
     budget_max = models.IntegerField(null=True, blank=True)
     safe_deal = models.BooleanField(default=False)
-    keywords = models.CharField(max_length=30)
+    keywords = models.CharField(max_length=255, blank=True)
     without_executor = models.BooleanField(default=True)
     chapters = models.ManyToManyField(Chapter)
 
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['active', 'budget_min', 'budget_max'],
+                name='backend_filter_match_idx',
+            ),
+        ]
+
     def is_valid_project(self, project: Project):
         budget_min = self.budget_min or 0
         budget_max = self.budget_max or 10**9
@@ -138,26 +234,71 @@ class BotUserFilter(models.Model):
         if self.without_executor and not project.without_executor:
             return False
 
-        user_filter_chapters = self.chapters.all()
-        if not user_filter_chapters.exists():
-            return True
-
-        for chapter in project.chapters.all():
-            if chapter in user_filter_chapters:
-                return True
+        user_filter_chapter_ids = set(
+            self.chapters.values_list('id', flat=True)
+        )
+        if user_filter_chapter_ids:
+            project_chapter_ids = project.chapters.values_list('id',
+                                                               flat=True)
+            if user_filter_chapter_ids.isdisjoint(project_chapter_ids):
+                return False
 
-        return False
+        return contains_keywords(self.keywords, get_project_text(project))
 
     def __str__(self):
         return str(self.user)
 
 
+# One retry policy for notifier tasks and their deliveries: every run of
+# a task retries all its pending deliveries, runs are spaced by an
+# exponential backoff, and after the last one the rest are failed.
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY = timezone.timedelta(seconds=30)
+
+
+def get_retry_delay(attempts):
+    return TASK_RETRY_DELAY * 2 ** max(attempts - 1, 0)
+
+
+def lease_free(now):
+    return Q(lease_expires__isnull=True) | Q(lease_expires__lt=now)
+
+
 class UnfulfilledManager(models.Manager):
     def get_queryset(self):
+        now = timezone.now()
         return super().get_queryset().filter(
-            when__lt=timezone.now(),
+            lease_free(now),
+            when__lt=now,
+            done=False,
+        )
+
+
+class TaskQueueManager(models.Manager):
+    def claim(self, owner, limit=10, lease=timezone.timedelta(minutes=15)):
+        now = timezone.now()
+        lease_expires = now + lease
+        due_ids = self.filter(
+            lease_free(now),
+            when__lt=now,
+            done=False,
+        ).order_by('when').values('id')[:limit]
+        claimed = self.filter(
+            lease_free(now),
+            id__in=due_ids,
             done=False,
+        ).update(
+            owner=owner,
+            lease_expires=lease_expires,
+            attempts=F('attempts') + 1,
         )
+        if not claimed:
+            return []
+
+        return list(self.filter(
+            owner=owner,
+            lease_expires=lease_expires,
+        ).select_related('project').order_by('when'))
 
 
 class TaskManager(models.Model):
@@ -166,22 +307,129 @@ class TaskManager(models.Model):
 
     tasks = models.Manager()
     unfulfilled = UnfulfilledManager()
+    queue = TaskQueueManager()
 
     type = models.CharField(max_length=30, choices=Type.choices)
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
     when = models.DateTimeField(default=timezone.now)
     done = models.BooleanField(default=False)
 
+    owner = models.CharField(max_length=255, blank=True, default='')
+    lease_expires = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-when']
+        indexes = [
+            models.Index(
+                fields=['done', 'when'],
+                name='backend_task_due_idx',
+            ),
+        ]
+
+    def release(self, **fields):
+        fields |= {'owner': '', 'lease_expires': None}
+        TaskManager.tasks.filter(
+            id=self.id,
+            owner=self.owner,
+        ).update(updated=timezone.now(), **fields)
+
+        for field, value in fields.items():
+            setattr(self, field, value)
+
+    def renew(self, lease=timezone.timedelta(minutes=15)) -> bool:
+        # False once another worker has claimed the task
+        lease_expires = timezone.now() + lease
+        renewed = TaskManager.tasks.filter(
+            id=self.id,
+            owner=self.owner,
+            done=False,
+        ).update(lease_expires=lease_expires)
+        if renewed:
+            self.lease_expires = lease_expires
+        return bool(renewed)
+
+    def complete(self):
+        self.release(done=True)
+
+    def fail(self, error):
+        if self.attempts >= TASK_MAX_ATTEMPTS:
+            self.give_up(error)
+            return
+
+        self.release(
+            when=timezone.now() + get_retry_delay(self.attempts),
+            last_error=error,
+        )
+
+    def give_up(self, error):
+        Delivery.deliveries.filter(
+            project_id=self.project_id,
+            status=Delivery.Status.PENDING,
+        ).update(status=Delivery.Status.FAILED, updated=timezone.now())
+        self.release(done=True, last_error=error)
 
     def __str__(self):
         return f'{self.id}. {self.type}({self.project.id})'
 
 
+class Delivery(models.Model):
+    class Status(models.IntegerChoices):
+        PENDING = 0
+        SENT = 1
+        FAILED = 2
+
+    deliveries = models.Manager()
+    project = models.ForeignKey(
+        to=Project,
+        on_delete=models.CASCADE,
+        related_name='deliveries',
+    )
+    chat_id = models.IntegerField()
+    status = models.IntegerField(choices=Status.choices,
+                                 default=Status.PENDING)
+    attempts = models.IntegerField(default=0)
+    message_id = models.IntegerField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['project', 'chat_id'],
+                name='backend_delivery_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['project', 'status'],
+                name='backend_delivery_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.project_id} -> {self.chat_id}'
+
+
+class MediaFile(models.Model):
+    files = models.Manager()
+    path = models.CharField(max_length=255, unique=True)
+    digest = models.CharField(max_length=40)
+    file_id = models.CharField(max_length=255)
+
+    created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.path
+
+
 class KeyManager(models.Manager):
     def get_queryset(self):
         return super().get_queryset().filter(type=Template.Type.KEY)
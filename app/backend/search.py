@@ -0,0 +1,89 @@
+import re
+
+from django.db import connection
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.expressions import RawSQL
+
+from backend.keywords import parse_keywords
+from backend.models import Project
+
+
+FTS_TABLE = 'backend_project_fts'
+FTS_MATCH_SQL = f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s'
+
+
+def has_fts() -> bool:
+    return connection.vendor == 'sqlite'
+
+
+def make_fts_query(keywords: list[str]) -> str:
+    # Every keyword becomes a prefix phrase query: "телеграм бот"*
+    phrases = []
+    for keyword in keywords:
+        if (tokens := re.findall(r'\w+', keyword)):
+            phrases.append('"' + ' '.join(tokens) + '"*')
+
+    return ' OR '.join(phrases)
+
+
+def filter_facets(projects, chapter_ids=(), budget_min=None,
+                  budget_max=None, safe_deal=False, without_executor=False):
+    # Same predicates as BotUserFilter.objects.matching: projects without
+    # a budget pass any budget limits.
+    if chapter_ids:
+        ProjectChapter = Project.chapters.through
+        projects = projects.filter(Exists(ProjectChapter.objects.filter(
+            project_id=OuterRef('pk'),
+            chapter_id__in=chapter_ids,
+        )))
+
+    no_budget = Q(budget__isnull=True) | Q(budget=0)
+    if budget_min:
+        projects = projects.filter(no_budget | Q(budget__gte=budget_min))
+
+    if budget_max:
+        projects = projects.filter(no_budget | Q(budget__lte=budget_max))
+
+    if safe_deal:
+        projects = projects.filter(safe_deal=True)
+
+    if without_executor:
+        projects = projects.filter(without_executor=True)
+
+    return projects
+
+
+def search_projects(keywords='', chapter_ids=(), budget_min=None,
+                    budget_max=None, safe_deal=False, without_executor=False):
+    # Newest first, the browser pages by the (published, id) keyset
+    projects = filter_facets(Project.projects.all(), chapter_ids,
+                             budget_min, budget_max, safe_deal,
+                             without_executor)
+    if not (keywords := parse_keywords(keywords)):
+        return projects.order_by('-published', '-id')
+
+    if has_fts():
+        if (fts_query := make_fts_query(keywords)):
+            projects = projects.filter(
+                id__in=RawSQL(FTS_MATCH_SQL, (fts_query,)),
+            )
+        return projects.order_by('-published', '-id')
+
+    matches = Q()
+    for keyword in keywords:
+        matches |= Q(title__icontains=keyword)
+        matches |= Q(description__icontains=keyword)
+    return projects.filter(matches).order_by('-published', '-id')
+
+
+def filter_keyset(projects, published, project_id, back=False):
+    # Projects after the (published, id) cursor in (-published, -id)
+    # order, or before it when paging back.
+    if back:
+        after = (Q(published__gt=published) |
+                 Q(published=published, id__gt=project_id))
+        return projects.filter(after).order_by('published', 'id')
+
+    before = (Q(published__lt=published) |
+              Q(published=published, id__lt=project_id))
+    return projects.filter(before).order_by('-published', '-id')
@@ -1,8 +1,27 @@
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 
-from backend.models import BotUser, BotUserFilter, Project, TaskManager
+from backend.chapters import chapter_registry
+from backend.chats import chat_cache
+from backend.matcher import subscription_matcher
+from backend.wakeup import notify_tasks
+from backend.models import (BotUser, BotUserFilter, Chapter, Project,
+                            TaskManager)
+
+
+@receiver(connection_created)
+def connection_created_handler(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
 
 
 @receiver(post_save, sender=BotUser)
@@ -10,6 +29,13 @@ def bot_user_post_save_handler(sender, instance, created, **kwargs):
     if created:
         BotUserFilter.objects.create(user=instance)
 
+    chat_cache.user_saved(instance)
+
+
+@receiver(post_delete, sender=BotUser)
+def bot_user_post_delete_handler(sender, instance, **kwargs):
+    chat_cache.invalidate(instance.id)
+
 
 @receiver(post_save, sender=Project)
 def project_post_save_handler(sender, instance, created, **kwargs):
@@ -18,3 +44,45 @@ def project_post_save_handler(sender, instance, created, **kwargs):
             type=TaskManager.Type.NEW_PROJECT,
             project=instance,
         )
+
+
+@receiver(post_save, sender=TaskManager)
+def task_post_save_handler(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(notify_tasks)
+
+
+@receiver(post_save, sender=Chapter)
+@receiver(post_delete, sender=Chapter)
+def chapter_changed_handler(sender, instance, **kwargs):
+    chapter_registry.invalidate()
+
+
+@receiver(post_save, sender=BotUserFilter)
+@receiver(post_delete, sender=BotUserFilter)
+def bot_user_filter_changed_handler(sender, instance, **kwargs):
+    subscription_matcher.invalidate()
+    if kwargs.get('signal') is post_delete:
+        chat_cache.invalidate(instance.user_id)
+    else:
+        chat_cache.filter_saved(instance)
+
+
+@receiver(m2m_changed, sender=BotUserFilter.chapters.through)
+def bot_user_filter_chapters_changed_handler(sender, instance, action,
+                                             reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+
+    updated = timezone.now()
+    filters = BotUserFilter.objects.all()
+    if not reverse:
+        filters = filters.filter(pk=instance.pk)
+        chat_cache.chapters_changed(instance, action, pk_set, updated)
+    else:
+        if pk_set is not None:
+            filters = filters.filter(pk__in=pk_set)
+        chat_cache.invalidate()
+
+    filters.update(updated=updated)
+    subscription_matcher.invalidate()
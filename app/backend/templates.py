@@ -31,8 +31,11 @@ class Messages():
     CANCELED = messages[2]
     FILTER_BUDGET_INCORRECT_INPUT = messages[3]
     SAVED = messages[4]
+    NO_PROJECTS = messages[5]
 
 
 class Smiles():
     ON = smiles[0]
     OFF = smiles[1]
+    PREVIOUS = smiles[2]
+    NEXT = smiles[3]
@@ -1,3 +1,168 @@
-from django.test import TestCase
+import sys
 
-# Create your tests here.
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from backend.keywords import KeywordAutomaton, parse_keywords
+from backend.matcher import subscription_matcher
+from backend.models import BotUser, BotUserFilter, Chapter, Project
+
+# The bot package lives next to the Django project
+sys.path.append(str(settings.BASE_DIR.parent))
+
+from bot.call_types import CallTypes  # noqa: E402
+
+
+def search(keywords, text):
+    keywords = parse_keywords(keywords)
+    automaton = KeywordAutomaton(keywords)
+    return {automaton.keywords[keyword_id]
+            for keyword_id in automaton.search(text)}
+
+
+class KeywordAutomatonTests(SimpleTestCase):
+    def test_matches_word_prefix(self):
+        self.assertEqual(search('бот', 'Нужны боты и бота'), {'бот'})
+        self.assertEqual(search('бот', 'Telegram-бот для записи'), {'бот'})
+        self.assertEqual(search('бот', '(бот)'), {'бот'})
+
+    def test_ignores_match_inside_word(self):
+        self.assertEqual(search('бот', 'Удаленная работа'), set())
+        self.assertEqual(search('python', 'cpython'), set())
+
+    def test_folds_case_and_yo(self):
+        self.assertEqual(search('ёлка', 'Новогодняя ЕЛКА'), {'елка'})
+        self.assertEqual(search('елка', 'Ёлка на заказ'), {'елка'})
+
+    def test_collapses_whitespace(self):
+        self.assertEqual(search('телеграм  бот', 'телеграм \n\t бота'),
+                         {'телеграм бот'})
+
+    def test_overlapping_keywords(self):
+        self.assertEqual(search('django, dj, go', 'Django go'),
+                         {'django', 'dj', 'go'})
+
+
+class SubscriptionMatchersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        design = Chapter.chapters.create(name='Дизайн')
+        logos = Chapter.chapters.create(name='Логотипы', parent=design)
+        code = Chapter.chapters.create(name='Программирование')
+        bots = Chapter.chapters.create(name='Боты', parent=code)
+        web = Chapter.chapters.create(name='Веб', parent=code)
+
+        projects = [
+            ('Telegram-бот для записи', 15000, True, True, [code, bots]),
+            ('Логотип для кофейни', 8000, False, True, [design, logos]),
+            ('Парсер на Python', None, True, False, [code]),
+            ('Сайт на Django', 0, False, True, [code, web]),
+            ('Удаленная работа', 50000, True, True, []),
+            ('Ёлочные игрушки', 3000, False, False, [design]),
+        ]
+        now = timezone.now()
+        for article, (title, budget, safe_deal, without_executor,
+                      chapters) in enumerate(projects, 1):
+            project = Project.projects.create(
+                article=article,
+                title=title,
+                description='',
+                budget=budget,
+                safe_deal=safe_deal,
+                without_executor=without_executor,
+                published=now,
+                url=f'https://fl.ru/projects/{article}/',
+            )
+            project.chapters.set(chapters)
+
+        filters = [
+            {},
+            {'keywords': 'бот'},
+            {'keywords': 'python, django'},
+            {'keywords': 'елк'},
+            {'budget_min': 10000},
+            {'budget_max': 10000},
+            {'budget_max': 0, 'budget_min': 5000},
+            {'safe_deal': True},
+            {'without_executor': False},
+            {'active': False},
+            {'chapters': [bots]},
+            {'chapters': [logos, web], 'keywords': 'сайт'},
+        ]
+        for chat_id, fields in enumerate(filters, 1):
+            user = BotUser.users.create(chat_id=chat_id)
+            chapters = fields.pop('chapters', [])
+            BotUserFilter.objects.filter(user=user).update(**fields)
+            user.filter.chapters.set(chapters)
+
+    def test_matchers_agree(self):
+        subscription_matcher.invalidate()
+        filters = BotUserFilter.objects.filter(active=True)
+        for project in Project.projects.all():
+            with self.subTest(project=project.title):
+                expected = sorted(
+                    user_filter.user.chat_id for user_filter in filters
+                    if user_filter.is_valid_project(project)
+                )
+                self.assertEqual(
+                    sorted(BotUserFilter.objects.matching(project)),
+                    expected,
+                )
+                self.assertEqual(
+                    sorted(subscription_matcher.match(project)),
+                    expected,
+                )
+
+    def test_fixture_covers_both_outcomes(self):
+        subscription_matcher.invalidate()
+        matched = [subscription_matcher.match(project)
+                   for project in Project.projects.all()]
+        self.assertTrue(all(matched))
+        self.assertTrue(all(len(chat_ids) < BotUser.users.count()
+                            for chat_ids in matched))
+
+
+class CallTypesTests(SimpleTestCase):
+    SAMPLES = [
+        CallTypes.Menu(),
+        CallTypes.Language(lang='ru'),
+        CallTypes.FilterChapter(chapter_id=123),
+        CallTypes.ProjectsPage(page=12, published=1632230940,
+                               project_id=4840450, back=1),
+        CallTypes.ProjectsPage(page=-1, published=0, project_id=0, back=0),
+    ]
+
+    def assertSameCall(self, first, second):
+        self.assertIs(type(first), type(second))
+        self.assertEqual(first.__dict__, second.__dict__)
+
+    def test_round_trip(self):
+        for call_type in self.SAMPLES:
+            with self.subTest(call_type=str(call_type)):
+                call_data = CallTypes.make_data(call_type)
+                self.assertLessEqual(len(call_data.encode()), 64)
+                self.assertSameCall(CallTypes.parse_data(call_data),
+                                    call_type)
+
+    def test_legacy_round_trip(self):
+        for call_type in self.SAMPLES:
+            with self.subTest(call_type=str(call_type)):
+                call_data = CallTypes.make_legacy_data(call_type)
+                self.assertSameCall(CallTypes.parse_data(call_data),
+                                    call_type)
+
+    def test_legacy_buttons(self):
+        call_type = CallTypes.parse_data('type:ProjectsPage|page:3')
+        self.assertSameCall(call_type, CallTypes.ProjectsPage(
+            page=3, published=0, project_id=0, back=0,
+        ))
+        call_type = CallTypes.parse_data('type:FilterChapter|chapter_id:7'
+                                         '|unknown:1')
+        self.assertSameCall(call_type, CallTypes.FilterChapter(chapter_id=7))
+
+    def test_undecodable(self):
+        for call_data in ['type:Removed', 'type:ProjectsPage|page:x',
+                          '', '!!!', 'AAAA']:
+            with self.subTest(call_data=call_data):
+                self.assertIsNone(CallTypes.parse_data(call_data))
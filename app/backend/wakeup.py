@@ -0,0 +1,47 @@
+import select
+import socket
+import time
+
+from django.conf import settings
+
+
+def notify_tasks():
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(b'1', settings.TASKS_WAKEUP_ADDRESS)
+    except OSError:
+        pass
+
+
+class TaskWakeup():
+    def __init__(self, address=None):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if hasattr(socket, 'SO_REUSEPORT'):
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        try:
+            self.sock.bind(address or settings.TASKS_WAKEUP_ADDRESS)
+        except OSError:
+            self.sock.close()
+            self.sock = None
+        else:
+            self.sock.setblocking(False)
+
+    def drain(self):
+        while self.sock:
+            try:
+                self.sock.recv(64)
+            except BlockingIOError:
+                return
+
+    def wait(self, timeout) -> bool:
+        if self.sock is None:
+            time.sleep(timeout)
+            return False
+
+        readable, _, _ = select.select([self.sock], [], [], timeout)
+        self.drain()
+        return bool(readable)
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
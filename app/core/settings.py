@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -74,14 +75,77 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# The server, parser, task manager and bot share one database. SQLite is
+# tuned for that in backend/signals.py (WAL, busy timeout etc.), set
+# DB_ENGINE=django.db.backends.postgresql and DB_* to switch to PostgreSQL.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'django.db.backends.sqlite3')
+
+if DB_ENGINE == 'django.db.backends.sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': DB_ENGINE,
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # busy_timeout, seconds
+                'timeout': int(os.environ.get('DB_TIMEOUT', 20)),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': DB_ENGINE,
+            'NAME': os.environ.get('DB_NAME', 'flru'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', ''),
+            'PORT': os.environ.get('DB_PORT', ''),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        }
     }
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': int(os.environ.get('DB_MMAP_SIZE', 256 * 2**20)),
+    # negative values are KiB
+    'cache_size': -int(os.environ.get('DB_CACHE_SIZE', 64 * 2**10)),
+    'temp_store': 'memory',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
 }
 
 
+# Notifier wake-up socket, see backend/wakeup.py
+
+TASKS_WAKEUP_ADDRESS = ('127.0.0.1', 7778)
+
+
+# Notifier processes running with one bot token, they split its rate limit
+# between them, see bot/task_manager.py
+
+NOTIFIER_WORKERS = int(os.environ.get('NOTIFIER_WORKERS', 1))
+
+
+# Project archive, see backend/archive.py
+
+ARCHIVE_DIR = BASE_DIR / 'archive'
+
+ARCHIVE_AFTER_DAYS = 90
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,49 @@
+import argparse
+import time
+
+import config
+
+from bot.call_types import CallTypes
+
+
+SAMPLES = [
+    CallTypes.Menu(),
+    CallTypes.Settings(),
+    CallTypes.FilterChapter(chapter_id=123),
+    CallTypes.FilterChapterSelectAll(chapter_id=45),
+    CallTypes.ProjectsPage(page=12, published=1632230940,
+                           project_id=4840450, back=1),
+]
+
+
+def measure(function, arguments, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for argument in arguments:
+            function(argument)
+    seconds = time.perf_counter() - start
+    return repeat * len(arguments) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compares the compact and legacy callback_data codecs',
+    )
+    parser.add_argument('--repeat', type=int, default=20000)
+    args = parser.parse_args()
+
+    codecs = {
+        'legacy': CallTypes.make_legacy_data,
+        'compact': CallTypes.make_data,
+    }
+    for name, make_data in codecs.items():
+        datas = [make_data(call_type) for call_type in SAMPLES]
+        sizes = [len(data.encode()) for data in datas]
+        encode = measure(make_data, SAMPLES, args.repeat)
+        decode = measure(CallTypes.parse_data, datas, args.repeat)
+        print(f'{name:>8}: encode {encode:,.0f}/s, decode {decode:,.0f}/s, '
+              f'size avg {sum(sizes) / len(sizes):.1f} max {max(sizes)} B')
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,39 @@
+import base64
+import binascii
+import zlib
+
+
+INT = 'int'
+LIST = 'list'
+STR = 'str'
+TAG_BITS = 14
+
+
+def parse_arg(arg: str):
+    for kind in (INT, LIST):
+        if arg.endswith(f'__{kind}'):
+            return arg.removesuffix(f'__{kind}'), kind
+
+    return arg, STR
+
+
+def get_tag(name: str) -> int:
+    # Derived from the name, so old buttons keep working whatever order
+    # the call types are declared in.
+    return zlib.crc32(name.encode()) & ((1 << TAG_BITS) - 1)
+
+
 class CallTypeMeta(type):
     def __new__(cls, name, *args):
         def __init__(self, **kwargs):
             assert(len(args) == len(kwargs))
-            for arg in args:
-                if arg.endswith('__int'):
-                    suffix_removed_arg = arg.removesuffix('__int')
-                    value = int(kwargs[suffix_removed_arg])
-                    setattr(self, suffix_removed_arg, value)
-                elif arg.endswith('__list'):
-                    suffix_removed_arg = arg.removesuffix('__list')
-                    value = '#'.join(map(str, kwargs[suffix_removed_arg]))
-                    setattr(self, suffix_removed_arg, value)
-                else:
-                    setattr(self, arg, kwargs[arg])
+            for arg, kind in self.args:
+                value = kwargs[arg]
+                if kind == INT:
+                    value = int(value)
+                elif kind == LIST:
+                    value = [int(item) for item in value]
+                setattr(self, arg, value)
 
         def __str__(self):
             args = {
@@ -23,20 +44,48 @@ class CallTypeMeta(type):
         CallType = type(name, (), {})
         CallType.__init__ = __init__
         CallType.__str__ = __str__
+        CallType.args = tuple(map(parse_arg, args))
+        CallType.tag = get_tag(name)
         return CallType
 
 
+def write_varint(buffer: bytearray, value: int):
+    # zigzag, so small negative numbers stay short
+    value = value << 1 if value >= 0 else (-value << 1) - 1
+    while value >= 0x80:
+        buffer.append(value & 0x7f | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data: bytes, position: int):
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if byte < 0x80:
+            break
+
+    value = value >> 1 if not value & 1 else -((value + 1) >> 1)
+    return value, position
+
+
 class CallTypes():
     ARGS_SEP = '|'
     ARG_SEP = ':'
     VALUES_SEP = '#'
     CLASS_NAME = 'type'
+    LEGACY_PREFIX = CLASS_NAME + ARG_SEP
 
     Menu = CallTypeMeta('Menu')
     Back = CallTypeMeta('Back')
     Language = CallTypeMeta('Language', 'lang')
 
-    ProjectsPage = CallTypeMeta('ProjectsPage', 'page__int')
+    ProjectsPage = CallTypeMeta('ProjectsPage', 'page__int',
+                                'published__int', 'project_id__int',
+                                'back__int')
     Settings = CallTypeMeta('Settings')
 
     FilterActive = CallTypeMeta('FilterActive')
@@ -54,8 +103,24 @@ class CallTypes():
 
     Nothing = CallTypeMeta('Nothing')
 
+    by_name = {}
+    by_tag = {}
+
     @classmethod
-    def parse_data(cls, call_data: str):
+    def register(cls):
+        for name, value in list(cls.__dict__.items()):
+            if not hasattr(value, 'tag'):
+                continue
+
+            if value.tag in cls.by_tag:
+                other = cls.by_tag[value.tag].__name__
+                raise ValueError(f'Tag collision: {name} and {other}')
+
+            cls.by_name[name] = value
+            cls.by_tag[value.tag] = value
+
+    @classmethod
+    def parse_legacy_data(cls, call_data: str):
         args = {}
         for arg in call_data.split(cls.ARGS_SEP):
             key, value = arg.split(cls.ARG_SEP)
@@ -64,19 +129,85 @@ class CallTypes():
             else:
                 args[key] = value
 
-        call_type_name = args.pop(cls.CLASS_NAME)
-        for key, value in cls.__dict__.items():
-            if key == call_type_name:
-                class_ = value
-                return class_(**args)
+        name = args.pop(cls.CLASS_NAME)
+        CallType = cls.by_name[name]
+        kwargs = {}
+        for arg, kind in CallType.args:
+            # Buttons sent before an argument was added, unknown arguments
+            # are dropped.
+            value = args.get(arg, [] if kind == LIST else 0)
+            if kind == LIST and not isinstance(value, list):
+                value = [value] if value else []
+            kwargs[arg] = value
+
+        return CallType(**kwargs)
+
+    @classmethod
+    def parse_data(cls, call_data: str):
+        # None for buttons that can't be decoded any more
+        try:
+            if call_data.startswith(cls.LEGACY_PREFIX):
+                return cls.parse_legacy_data(call_data)
+
+            return cls.parse_compact_data(call_data)
+        except (KeyError, ValueError, IndexError, binascii.Error):
+            return None
+
+    @classmethod
+    def parse_compact_data(cls, call_data: str):
+        padding = '=' * (-len(call_data) % 4)
+        data = base64.urlsafe_b64decode(call_data + padding)
+        tag, position = read_varint(data, 0)
+        CallType = cls.by_tag[tag]
+        args = {}
+        for arg, kind in CallType.args:
+            if kind == INT:
+                args[arg], position = read_varint(data, position)
+            elif kind == LIST:
+                count, position = read_varint(data, position)
+                args[arg] = []
+                for _ in range(count):
+                    item, position = read_varint(data, position)
+                    args[arg].append(item)
+            else:
+                length, position = read_varint(data, position)
+                args[arg] = data[position:position + length].decode()
+                position += length
+
+        return CallType(**args)
 
     @classmethod
     def make_data(cls, call_type):
-        args = {
-            cls.CLASS_NAME: call_type.__class__.__name__,
-        } | call_type.__dict__
+        data = bytearray()
+        write_varint(data, call_type.tag)
+        for arg, kind in call_type.args:
+            value = getattr(call_type, arg)
+            if kind == INT:
+                write_varint(data, value)
+            elif kind == LIST:
+                write_varint(data, len(value))
+                for item in value:
+                    write_varint(data, item)
+            else:
+                value = str(value).encode()
+                write_varint(data, len(value))
+                data += value
+
+        return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+    @classmethod
+    def make_legacy_data(cls, call_type):
+        args = {cls.CLASS_NAME: call_type.__class__.__name__}
+        for arg, kind in call_type.args:
+            value = getattr(call_type, arg)
+            if kind == LIST:
+                value = cls.VALUES_SEP.join(map(str, value))
+            args[arg] = value
+
         call_data = cls.ARGS_SEP.join(
             map(lambda key: f'{key}{cls.ARG_SEP}{args[key]}', args)
         )
         return call_data
 
+
+CallTypes.register()
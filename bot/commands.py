@@ -1,8 +1,8 @@
 import telebot
 from telebot import types
 
+from backend.chats import chat_cache
 from backend.templates import Messages, Keys
-from backend.models import BotUser
 
 from bot import utils
 from bot.call_types import CallTypes
@@ -18,6 +18,9 @@ def menu_command_handler(bot: telebot.TeleBot, message):
         text=Keys.PROJECTS.text,
         CallType=CallTypes.ProjectsPage,
         page=1,
+        published=0,
+        project_id=0,
+        back=0,
     )
     settings_button = utils.make_inline_button(
         text=Keys.SETTINGS.text,
@@ -51,9 +54,9 @@ def back_call_handler(bot: telebot.TeleBot, call):
 
 def cancel_command_handler(bot: telebot.TeleBot, message):
     chat_id = message.chat.id
-    user = BotUser.users.get(chat_id=chat_id)
+    user = chat_cache.get_user(chat_id)
     user.state = None
-    user.save()
+    user.save(update_fields=['state', 'updated'])
 
     text = Messages.CANCELED.text
     keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
@@ -0,0 +1,175 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from telebot.apihelper import ApiTelegramException
+
+
+DELIVERY_WORKERS = 8
+# Per bot token, shared by all the processes that send with it
+GLOBAL_RATE = 30
+CHAT_RATE = 1
+MAX_ATTEMPTS = 5
+BAD_REQUEST = 400
+FORBIDDEN = 403
+TOO_MANY_REQUESTS = 429
+CHAT_BUCKETS_PRUNE_INTERVAL = 60
+
+
+class TokenBucket():
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until,
+                                    time.monotonic() + seconds)
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                else:
+                    elapsed = now - self.updated
+                    self.tokens = min(self.capacity,
+                                      self.tokens + elapsed * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+
+                    delay = (1 - self.tokens) / self.rate
+
+            time.sleep(delay)
+
+    def is_idle(self, now):
+        # Refilled and not paused, so equal to a new bucket
+        with self.lock:
+            return (now >= self.paused_until and
+                    now - self.updated >= self.capacity / self.rate)
+
+
+class DeliveryReport():
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sent = {}
+        self.retried = 0
+        self.failed = {}
+        self.seconds = 0.0
+
+    def add_sent(self, chat_id, result):
+        with self.lock:
+            self.sent[chat_id] = result
+
+    def add_retried(self):
+        with self.lock:
+            self.retried += 1
+
+    def add_failed(self, chat_id, error):
+        with self.lock:
+            self.failed[chat_id] = error
+
+    def __str__(self):
+        return (f'{len(self.sent)} sent, {len(self.failed)} failed, '
+                f'{self.retried} retried in {self.seconds:.2f} s')
+
+
+def is_permanent_error(exception):
+    if not isinstance(exception, ApiTelegramException):
+        return False
+
+    if exception.error_code == FORBIDDEN:
+        return True
+
+    description = (exception.description or '').lower()
+    return (exception.error_code == BAD_REQUEST and
+            'chat not found' in description)
+
+
+def get_retry_after(exception: ApiTelegramException):
+    parameters = (exception.result_json or {}).get('parameters') or {}
+    return parameters.get('retry_after', 1)
+
+
+class DeliveryEngine():
+    def __init__(self, workers=DELIVERY_WORKERS, global_rate=GLOBAL_RATE,
+                 chat_rate=CHAT_RATE):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.global_bucket = TokenBucket(global_rate)
+        self.chat_rate = chat_rate
+        self.chat_buckets = {}
+        self.chat_buckets_lock = threading.Lock()
+        self.chat_buckets_pruned = time.monotonic()
+
+    def prune_chat_buckets(self, now):
+        self.chat_buckets = {
+            chat_id: bucket for chat_id, bucket in self.chat_buckets.items()
+            if not bucket.is_idle(now)
+        }
+        self.chat_buckets_pruned = now
+
+    def get_chat_bucket(self, chat_id) -> TokenBucket:
+        with self.chat_buckets_lock:
+            now = time.monotonic()
+            if now - self.chat_buckets_pruned > CHAT_BUCKETS_PRUNE_INTERVAL:
+                self.prune_chat_buckets(now)
+
+            if chat_id not in self.chat_buckets:
+                self.chat_buckets[chat_id] = TokenBucket(self.chat_rate)
+
+            return self.chat_buckets[chat_id]
+
+    def try_send(self, chat_id, send, report: DeliveryReport):
+        chat_bucket = self.get_chat_bucket(chat_id)
+        for _ in range(MAX_ATTEMPTS):
+            chat_bucket.acquire()
+            self.global_bucket.acquire()
+            try:
+                result = send(chat_id)
+            except ApiTelegramException as exception:
+                if exception.error_code != TOO_MANY_REQUESTS:
+                    return None, exception
+
+                retry_after = get_retry_after(exception)
+                self.global_bucket.pause(retry_after)
+                chat_bucket.pause(retry_after)
+                report.add_retried()
+            except Exception as exception:
+                return None, exception
+            else:
+                return result, None
+
+        return None, 'Too many requests'
+
+    def send(self, chat_id, send, report: DeliveryReport, callback=None):
+        result, error = self.try_send(chat_id, send, report)
+        if error is None:
+            report.add_sent(chat_id, result)
+        else:
+            report.add_failed(chat_id, error)
+
+        # Called as soon as the chat is done, e.g. to record it
+        if callback:
+            callback(chat_id, result, error)
+
+    def deliver(self, chat_ids, send, report=None,
+                callback=None) -> DeliveryReport:
+        report = report or DeliveryReport()
+        start = time.monotonic()
+        futures = [
+            self.executor.submit(self.send, chat_id, send, report, callback)
+            for chat_id in chat_ids
+        ]
+        wait(futures)
+        report.seconds += time.monotonic() - start
+        for future in futures:
+            future.result()
+
+        return report
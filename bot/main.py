@@ -2,6 +2,7 @@ import config
 
 import telebot
 
+from backend.chats import chat_cache
 from backend.models import BotUser
 from backend.templates import Keys
 
@@ -34,13 +35,19 @@ def message_handler(message):
         commands.cancel_command_handler(bot, message)
         return
 
-    user, _ = BotUser.users.get_or_create(chat_id=chat_id)
-    if (state := user.state):
+    chat_state = chat_cache.get(chat_id)
+    if (state := chat_state.user.state):
         if state == BotUser.State.EDIT_BUDGET_MIN:
-            settings.filter_budget_min_message_handler(bot, message)
+            settings.filter_budget_min_message_handler(bot, message,
+                                                       chat_state)
 
         if state == BotUser.State.EDIT_BUDGET_MAX:
-            settings.filter_budget_max_message_handler(bot, message)
+            settings.filter_budget_max_message_handler(bot, message,
+                                                       chat_state)
+
+        if state == BotUser.State.EDIT_KEYWORDS:
+            settings.filter_keywords_message_handler(bot, message,
+                                                     chat_state)
 
         return
 
@@ -62,26 +69,29 @@ callback_query_handlers = {
     CallTypes.Menu: commands.menu_call_handler,
     CallTypes.Back: commands.back_call_handler,
 
+    CallTypes.ProjectsPage: projects.projects_call_handler,
+
     CallTypes.Settings: settings.settings_call_handler,
     CallTypes.FilterActive: settings.filter_active_call_handler,
     CallTypes.FilterSafeDeal: settings.filter_safe_deal_call_handler,
     CallTypes.FilterBudgetMin: settings.filter_budget_min_call_handler,
     CallTypes.FilterBudgetMax: settings.filter_budget_max_call_handler,
+    CallTypes.FilterKeywords: settings.filter_keywords_call_handler,
     CallTypes.FilterChapters: settings.filter_chapters_call_handler,
     CallTypes.FilterChapter: settings.filter_chapter_call_handler,
     CallTypes.FilterChapterSelectAll:
         settings.filter_chapter_select_all_call_handler,
-    CallTypes.FilterChapterReset: settings. filter_chapter_reset_call_handler,    
+    CallTypes.FilterChapterReset: settings.filter_chapter_reset_call_handler,
 }
 
 
 @bot.callback_query_handler(func=lambda _: True)
 def callback_query_handler(call):
-    call_type = CallTypes.parse_data(call.data)
-    for CallType, query_handler in callback_query_handlers.items():
-        if call_type.__class__.__name__ == CallType.__name__:
-            query_handler(bot, call)
-            break
+    if (call_type := CallTypes.parse_data(call.data)) is None:
+        return
+
+    if (query_handler := callback_query_handlers.get(type(call_type))):
+        query_handler(bot, call)
 
 
 if __name__ == "__main__":
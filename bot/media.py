@@ -0,0 +1,98 @@
+import hashlib
+import threading
+
+import telebot
+from django.conf import settings
+from telebot.apihelper import ApiTelegramException
+
+from backend.models import MediaFile
+
+
+BAD_REQUEST = 400
+INVALID_FILE_ID_ERRORS = (
+    'wrong file identifier',
+    'wrong remote file identifier',
+    'file reference expired',
+    'file_reference_expired',
+    'wrong padding in the string',
+)
+# Paths are relative to the repository root, not the working directory
+ROOT_DIR = settings.BASE_DIR.parent
+
+
+def get_full_path(path):
+    return ROOT_DIR / path
+
+
+def get_file_digest(path):
+    with open(get_full_path(path), 'rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+def is_invalid_file_id_error(exception: ApiTelegramException):
+    if exception.error_code != BAD_REQUEST:
+        return False
+
+    description = (exception.description or '').lower()
+    return any(error in description for error in INVALID_FILE_ID_ERRORS)
+
+
+class MediaCache():
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.digests = {}
+        self.file_ids = {}
+
+    def get_file_id(self, path):
+        if path in self.file_ids:
+            return self.file_ids[path]
+
+        if path not in self.digests:
+            self.digests[path] = get_file_digest(path)
+
+        media_file = MediaFile.files.filter(
+            path=path,
+            digest=self.digests[path],
+        ).first()
+        if media_file:
+            self.file_ids[path] = media_file.file_id
+            return media_file.file_id
+
+    def store(self, path, file_id):
+        MediaFile.files.update_or_create(
+            path=path,
+            defaults={'digest': self.digests[path], 'file_id': file_id},
+        )
+        self.file_ids[path] = file_id
+
+    def invalidate(self, path):
+        self.file_ids.pop(path, None)
+        MediaFile.files.filter(path=path).delete()
+
+    def upload_photo(self, bot: telebot.TeleBot, chat_id, path, **kwargs):
+        with self.lock:
+            if (file_id := self.get_file_id(path)):
+                return bot.send_photo(chat_id=chat_id, photo=file_id, **kwargs)
+
+            with open(get_full_path(path), 'rb') as photo:
+                message = bot.send_photo(chat_id=chat_id, photo=photo, **kwargs)
+
+            self.store(path, message.photo[-1].file_id)
+            return message
+
+    def send_photo(self, bot: telebot.TeleBot, chat_id, path, **kwargs):
+        if (file_id := self.get_file_id(path)):
+            try:
+                return bot.send_photo(chat_id=chat_id, photo=file_id, **kwargs)
+            except ApiTelegramException as exception:
+                if not is_invalid_file_id_error(exception):
+                    raise
+
+                with self.lock:
+                    if self.file_ids.get(path) == file_id:
+                        self.invalidate(path)
+
+        return self.upload_photo(bot, chat_id, path, **kwargs)
+
+
+media_cache = MediaCache()
@@ -1,24 +1,143 @@
+import html
+
 import telebot
-from django.db.models.query import QuerySet
+from django.core.cache import cache
+from django.utils import timezone
 
-from backend.models import BotUser, BotUserFilter, Project, Chapter
-from backend.templates import Keys
+from backend.chats import chat_cache, ChatState
+from backend.models import BotUserFilter, Project
+from backend.search import filter_keyset, search_projects
+from backend.templates import Keys, Messages
 
 from bot.call_types import CallTypes
+from bot import utils
+
+
+PROJECTS_PER_PAGE = 5
+PROJECTS_WINDOW_SIZE = 50
+PROJECTS_WINDOW_LIMIT = 500
+PROJECTS_WINDOW_TIMEOUT = 60
+
+
+def get_filter_projects(user_filter: BotUserFilter, chapter_ids=None):
+    if chapter_ids is None:
+        chapter_ids = user_filter.chapters.values_list('id', flat=True)
+
+    return search_projects(
+        keywords=user_filter.keywords,
+        chapter_ids=list(chapter_ids),
+        budget_min=user_filter.budget_min,
+        budget_max=user_filter.budget_max,
+        safe_deal=user_filter.safe_deal,
+        without_executor=user_filter.without_executor,
+    )
+
+
+def get_window_cache_key(user_filter: BotUserFilter):
+    version = int(user_filter.updated.timestamp() * 1000)
+    return f'projects_window:{user_filter.id}:{version}'
+
+
+def load_keys(projects, cursor=None, back=False, limit=PROJECTS_WINDOW_SIZE):
+    if cursor:
+        published = timezone.datetime.fromtimestamp(cursor[0],
+                                                     tz=timezone.utc)
+        projects = filter_keyset(projects, published, cursor[1], back)
+
+    keys = projects.values_list('published', 'id')[:limit]
+    return [(int(published.timestamp()), project_id)
+            for published, project_id in keys]
 
 
-def get_projects_by_chapters(chapters: QuerySet[Chapter]):
-    result = []
-    for chapter in chapters:
-        projects = Project.projects.filter(chapters__in=chapter)
-        if not result:
-            result = projects
-        else:
-            result |= projects
+def get_page_keys(state: ChatState, cursor, back):
+    # The keys of the first projects matching the filter are cached for a
+    # while, so flipping through them does not run the filter query. Pages
+    # beyond the cached window are loaded by the cursor directly.
+    projects = get_filter_projects(state.filter, state.chapter_ids)
+    cache_key = get_window_cache_key(state.filter)
+    window = cache.get(cache_key) or {'keys': [], 'complete': False}
+    keys = window['keys']
 
-    return projects
+    if cursor is None:
+        start = 0
+    elif cursor in keys:
+        index = keys.index(cursor)
+        start = max(index - PROJECTS_PER_PAGE, 0) if back else index + 1
+    else:
+        start = None
+
+    if start is not None:
+        end = start + PROJECTS_PER_PAGE
+        while (len(keys) <= end and not window['complete'] and
+                len(keys) < PROJECTS_WINDOW_LIMIT):
+            more = load_keys(projects, keys[-1] if keys else None)
+            keys += more
+            window['complete'] = len(more) < PROJECTS_WINDOW_SIZE
+
+        if len(keys) > end or window['complete']:
+            cache.set(cache_key, window, PROJECTS_WINDOW_TIMEOUT)
+            return keys[start:end], start > 0, len(keys) > end
+
+    keys = load_keys(projects, cursor, back, PROJECTS_PER_PAGE + 1)
+    has_more = len(keys) > PROJECTS_PER_PAGE
+    keys = keys[:PROJECTS_PER_PAGE]
+    if back:
+        return keys[::-1], has_more, True
+
+    return keys, True, has_more
+
+
+def get_project_line(project: Project):
+    title = html.escape(project.title)
+    published = utils.datetime_to_utc5_str(project.published)
+    return (f'<b><a href="{project.url}">{title}</a></b>\n'
+            f'💵 {project.get_budget_info()}  📅 {published}')
 
 
 def projects_call_handler(bot: telebot.TeleBot, call):
+    chat_id = call.message.chat.id
+    state = chat_cache.get(chat_id)
+
     call_type = CallTypes.parse_data(call.data)
-    page_number = call_type.page
+    cursor = None
+    if call_type.project_id:
+        cursor = (call_type.published, call_type.project_id)
+    keys, has_previous, has_next = get_page_keys(state, cursor,
+                                                 call_type.back)
+    projects = Project.projects.in_bulk([key[1] for key in keys])
+    page_projects = [projects[project_id] for _, project_id in keys
+                     if project_id in projects]
+
+    if page_projects:
+        text = '\n\n'.join(map(get_project_line, page_projects))
+    else:
+        text = Messages.NO_PROJECTS.text
+
+    previous_kwargs = next_kwargs = None
+    if has_previous and keys:
+        published, project_id = keys[0]
+        previous_kwargs = {'published': published,
+                           'project_id': project_id, 'back': 1}
+    if has_next and keys:
+        published, project_id = keys[-1]
+        next_kwargs = {'published': published,
+                       'project_id': project_id, 'back': 0}
+
+    keyboard = utils.make_keyset_keyboard(
+        CallType=CallTypes.ProjectsPage,
+        page_number=call_type.page,
+        previous_kwargs=previous_kwargs,
+        next_kwargs=next_kwargs,
+    )
+    menu_button = utils.make_inline_button(
+        text=Keys.MENU.text,
+        CallType=CallTypes.Menu,
+    )
+    keyboard.add(menu_button)
+    bot.edit_message_text(
+        text=text,
+        chat_id=chat_id,
+        message_id=call.message.id,
+        reply_markup=keyboard,
+        disable_web_page_preview=True,
+    )
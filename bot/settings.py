@@ -1,7 +1,11 @@
 import telebot
+from django.db import transaction
 from telebot import types
 
-from backend.models import BotUser, BotUserFilter, Chapter
+from backend.chapters import chapter_registry
+from backend.chats import chat_cache, ChatState
+from backend.keywords import split_keywords
+from backend.models import BotUser, BotUserFilter
 from backend.templates import Keys, Messages, Smiles
 
 from bot.call_types import CallTypes
@@ -35,9 +39,12 @@ def get_keywords_info(user_filter: BotUserFilter):
     return f'{Keys.KEYWORDS}:  {keywords if keywords else Keys.NOT_INDICATED}'
 
 
-def settings_call_handler(bot: telebot.TeleBot, call):
+# Handlers that re-render another menu pass it the state they checked, so
+# a button press reads the chat state once.
+def settings_call_handler(bot: telebot.TeleBot, call,
+                          state: ChatState = None):
     chat_id = call.message.chat.id
-    user = BotUser.users.get(chat_id=chat_id)
+    user = (state or chat_cache.get(chat_id)).user
 
     active_button = utils.make_inline_button(
         text=get_active_info(user.filter),
@@ -86,25 +93,25 @@ def settings_call_handler(bot: telebot.TeleBot, call):
 
 def filter_active_call_handler(bot: telebot.TeleBot, call):
     chat_id = call.message.chat.id
-    user = BotUser.users.get(chat_id=chat_id)
-    user.filter.active ^= True
-    user.filter.save()
-    settings_call_handler(bot, call)
+    state = chat_cache.get(chat_id)
+    state.filter.active ^= True
+    state.filter.save(update_fields=['active', 'updated'])
+    settings_call_handler(bot, call, state)
 
 
 def filter_safe_deal_call_handler(bot: telebot.TeleBot, call):
     chat_id = call.message.chat.id
-    user = BotUser.users.get(chat_id=chat_id)
-    user.filter.safe_deal ^= True
-    user.filter.save()
-    settings_call_handler(bot, call)
+    state = chat_cache.get(chat_id)
+    state.filter.safe_deal ^= True
+    state.filter.save(update_fields=['safe_deal', 'updated'])
+    settings_call_handler(bot, call, state)
 
 
 def filter_budget_min_call_handler(bot: telebot.TeleBot, call):
     chat_id = call.message.chat.id
-    user = BotUser.users.get(chat_id=chat_id)
+    user = chat_cache.get_user(chat_id)
     user.state = BotUser.State.EDIT_BUDGET_MIN
-    user.save()
+    user.save(update_fields=['state', 'updated'])
 
     keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
     keyboard.add(Keys.CANCEL.text)
@@ -113,9 +120,10 @@ def filter_budget_min_call_handler(bot: telebot.TeleBot, call):
                      reply_markup=keyboard)
 
 
-def filter_budget_min_message_handler(bot: telebot.TeleBot, message):
+def filter_budget_min_message_handler(bot: telebot.TeleBot, message,
+                                      state: ChatState = None):
     chat_id = message.chat.id
-    user = BotUser.users.get(chat_id=chat_id)
+    user = (state or chat_cache.get(chat_id)).user
     try:
         budget = int(message.text)
         if budget < 0:
@@ -125,9 +133,10 @@ def filter_budget_min_message_handler(bot: telebot.TeleBot, message):
         bot.send_message(chat_id, text)
     else:
         user.filter.budget_min = budget
-        user.filter.save()
         user.state = None
-        user.save()
+        with transaction.atomic():
+            user.filter.save(update_fields=['budget_min', 'updated'])
+            user.save(update_fields=['state', 'updated'])
         text = Messages.SAVED.text
         keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
         keyboard.add(Keys.MENU.text)
@@ -137,9 +146,9 @@ def filter_budget_min_message_handler(bot: telebot.TeleBot, message):
 
 def filter_budget_max_call_handler(bot: telebot.TeleBot, call):
     chat_id = call.message.chat.id
-    user = BotUser.users.get(chat_id=chat_id)
+    user = chat_cache.get_user(chat_id)
     user.state = BotUser.State.EDIT_BUDGET_MAX
-    user.save()
+    user.save(update_fields=['state', 'updated'])
 
     keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
     keyboard.add(Keys.CANCEL.text)
@@ -148,9 +157,10 @@ def filter_budget_max_call_handler(bot: telebot.TeleBot, call):
                      reply_markup=keyboard)
 
 
-def filter_budget_max_message_handler(bot: telebot.TeleBot, message):
+def filter_budget_max_message_handler(bot: telebot.TeleBot, message,
+                                      state: ChatState = None):
     chat_id = message.chat.id
-    user = BotUser.users.get(chat_id=chat_id)
+    user = (state or chat_cache.get(chat_id)).user
     try:
         budget = int(message.text)
         if budget < 0:
@@ -160,9 +170,10 @@ def filter_budget_max_message_handler(bot: telebot.TeleBot, message):
         bot.send_message(chat_id, text)
     else:
         user.filter.budget_max = budget
-        user.filter.save()
         user.state = None
-        user.save()
+        with transaction.atomic():
+            user.filter.save(update_fields=['budget_max', 'updated'])
+            user.save(update_fields=['state', 'updated'])
         text = Messages.SAVED.text
         keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
         keyboard.add(Keys.MENU.text)
@@ -170,15 +181,62 @@ def filter_budget_max_message_handler(bot: telebot.TeleBot, message):
                          reply_markup=keyboard)
 
 
-def filter_chapters_call_handler(bot: telebot.TeleBot, call):
+def filter_keywords_call_handler(bot: telebot.TeleBot, call):
     chat_id = call.message.chat.id
-    user = BotUser.users.get(chat_id=chat_id)
-    user_chapters = user.filter.chapters
+    user = chat_cache.get_user(chat_id)
+    user.state = BotUser.State.EDIT_KEYWORDS
+    user.save(update_fields=['state', 'updated'])
+
+    keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
+    keyboard.add(Keys.RESET.text)
+    keyboard.add(Keys.CANCEL.text)
+    text = Messages.ENTER.text
+    bot.send_message(chat_id, text,
+                     reply_markup=keyboard)
+
+
+def filter_keywords_message_handler(bot: telebot.TeleBot, message,
+                                    state: ChatState = None):
+    chat_id = message.chat.id
+    user = (state or chat_cache.get(chat_id)).user
+    keywords = []
+    if message.text not in Keys.RESET.getall():
+        max_length = BotUserFilter._meta.get_field('keywords').max_length
+        for keyword in split_keywords(message.text):
+            if len(', '.join(keywords + [keyword])) > max_length:
+                break
+            keywords.append(keyword)
+
+    user.filter.keywords = ', '.join(keywords)
+    user.state = None
+    with transaction.atomic():
+        user.filter.save(update_fields=['keywords', 'updated'])
+        user.save(update_fields=['state', 'updated'])
+    text = Messages.SAVED.text
+    keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True)
+    keyboard.add(Keys.MENU.text)
+    bot.send_message(chat_id, text,
+                     reply_markup=keyboard)
+
+
+def get_selected_parent_ids(chapter_ids: set[int]) -> set[int]:
+    parent_ids = set()
+    for chapter_id in chapter_ids:
+        if (chapter := chapter_registry.get(chapter_id)):
+            parent_ids.add(chapter.parent_id)
+
+    return parent_ids
+
+
+def filter_chapters_call_handler(bot: telebot.TeleBot, call,
+                                 state: ChatState = None):
+    chat_id = call.message.chat.id
+    state = state or chat_cache.get(chat_id)
+    selected_parent_ids = get_selected_parent_ids(state.chapter_ids)
 
-    chapters = Chapter.chapters.filter(parent=None)
     keyboard = types.InlineKeyboardMarkup()
-    for chapter in chapters:
-        chapter_selected = user_chapters.filter(parent=chapter).exists()
+    for chapter in chapter_registry.get_roots():
+        chapter_selected = chapter.id in selected_parent_ids
         smiles = [Smiles.OFF.text, Smiles.ON.text]
         text = f'{chapter.name} {smiles[chapter_selected]}'
         chapter_button = utils.make_inline_button(
@@ -209,16 +267,17 @@ def filter_chapters_call_handler(bot: telebot.TeleBot, call):
     )
 
 
-def filter_chapter_call_handler(bot: telebot.TeleBot, call):
+def filter_chapter_call_handler(bot: telebot.TeleBot, call,
+                                state: ChatState = None):
     chat_id = call.message.chat.id
-    user = BotUser.users.get(chat_id=chat_id)
-    user_chapters = user.filter.chapters
+    state = state or chat_cache.get(chat_id)
+    user_chapters = state.filter.chapters
 
     call_type = CallTypes.parse_data(call.data)
     chapter_id = call_type.chapter_id
-    chapter = Chapter.chapters.get(id=chapter_id)
+    chapter = chapter_registry.get(chapter_id)
 
-    if chapter.children.exists():
+    if (children := chapter_registry.get_children(chapter.id)):
         select_all_button = utils.make_inline_button(
             text=Keys.SELECT_ALL.text,
             CallType=CallTypes.FilterChapterSelectAll,
@@ -226,8 +285,8 @@ def filter_chapter_call_handler(bot: telebot.TeleBot, call):
         )
         keyboard = types.InlineKeyboardMarkup()
         keyboard.add(select_all_button)
-        for child in chapter.children.all():
-            chapter_selected = user_chapters.filter(id=child.id).exists()
+        for child in children:
+            chapter_selected = child.id in state.chapter_ids
             smiles = [Smiles.OFF.text, Smiles.ON.text]
             text = f'{child.name} {smiles[chapter_selected]}'
             chapter_button = utils.make_inline_button(
@@ -255,54 +314,57 @@ def filter_chapter_call_handler(bot: telebot.TeleBot, call):
             reply_markup=keyboard,
         )
     else:
-        if user_chapters.filter(id=chapter.id):
-            user_chapters.remove(chapter)
+        if chapter.id in state.chapter_ids:
+            user_chapters.remove(chapter.id)
         else:
-            user_chapters.add(chapter)
+            user_chapters.add(chapter.id)
 
-        call_type = CallTypes.FilterChapter(chapter_id=chapter.parent.id)
+        call_type = CallTypes.FilterChapter(chapter_id=chapter.parent_id)
         call_data = CallTypes.make_data(call_type)
         call.data = call_data
-        filter_chapter_call_handler(bot, call)
+        filter_chapter_call_handler(bot, call, state)
 
 
 def filter_chapter_select_all_call_handler(bot: telebot.TeleBot, call):
     chat_id = call.message.chat.id
-    user = BotUser.users.get(chat_id=chat_id)
-    user_chapters = user.filter.chapters
+    state = chat_cache.get(chat_id)
 
     call_type = CallTypes.parse_data(call.data)
     chapter_id = call_type.chapter_id
-    chapter = Chapter.chapters.get(id=chapter_id)
+    chapter = chapter_registry.get(chapter_id)
 
-    for child in chapter.children.all():
-        user_chapters.add(child)
+    children = chapter_registry.get_children(chapter.id)
+    if (chapter_ids := {child.id for child in children} - state.chapter_ids):
+        state.filter.chapters.add(*chapter_ids)
 
     call_type = CallTypes.FilterChapter(chapter_id=chapter.id)
     call_data = CallTypes.make_data(call_type)
     call.data = call_data
-    filter_chapter_call_handler(bot, call)
+    filter_chapter_call_handler(bot, call, state)
 
 
 def filter_chapter_reset_call_handler(bot: telebot.TeleBot, call):
     chat_id = call.message.chat.id
-    user = BotUser.users.get(chat_id=chat_id)
-    user_chapters = user.filter.chapters
+    state = chat_cache.get(chat_id)
+    user_chapters = state.filter.chapters
 
     call_type = CallTypes.parse_data(call.data)
     chapter_id = call_type.chapter_id
     if not chapter_id:
-        user_chapters.clear()
+        if state.chapter_ids:
+            user_chapters.clear()
         call_type = CallTypes.FilterChapters()
         call_data = CallTypes.make_data(call_type)
         call.data = call_data
-        filter_chapters_call_handler(bot, call)
+        filter_chapters_call_handler(bot, call, state)
     else:
-        chapter = Chapter.chapters.get(id=chapter_id)
-        for child in chapter.children.all():
-            user_chapters.remove(child)
+        chapter = chapter_registry.get(chapter_id)
+        children = chapter_registry.get_children(chapter.id)
+        if (chapter_ids := {child.id for child in children} &
+                state.chapter_ids):
+            user_chapters.remove(*chapter_ids)
 
         call_type = CallTypes.FilterChapter(chapter_id=chapter.id)
         call_data = CallTypes.make_data(call_type)
         call.data = call_data
-        filter_chapter_call_handler(bot, call)
+        filter_chapter_call_handler(bot, call, state)
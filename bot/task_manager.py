@@ -1,45 +1,135 @@
-import time
+import os
+import socket
 import traceback
 
 import telebot
+from django.conf import settings
+from django.utils import timezone
 
 import config
 import utils
+from delivery import (DeliveryEngine, DeliveryReport, GLOBAL_RATE,
+                      is_permanent_error)
+from media import media_cache
 
-from backend.templates import Messages
-from backend.models import TaskManager, Project, BotUser
+from backend.matcher import subscription_matcher
+from backend.models import TaskManager, Project, BotUserFilter, Delivery
+from backend.wakeup import TaskWakeup
 
 
-LOGO_IMAGE_PATH = '../parser/logo.jpg'
+LOGO_IMAGE_PATH = 'parser/logo.jpg'
+SUBSCRIPTION_MATCHER = 'index'
+IDLE_TIMEOUT_MIN = 1
+IDLE_TIMEOUT_MAX = 30
+TASK_LEASE = timezone.timedelta(minutes=15)
+TASK_CLAIM_LIMIT = 10
+WORKER_ID = f'{socket.gethostname()}:{os.getpid()}'
+DELIVERY_BATCH_SIZE = 100
 
+delivery_engine = DeliveryEngine(
+    global_rate=GLOBAL_RATE / settings.NOTIFIER_WORKERS,
+)
 
-def get_project_info(project: Project):
-    return Messages.PROJECT.text.format(
-            article=project.article,
-            title=project.title,
-            safe_deal_info=project.get_safe_deal_info(),
-            budget_info=project.get_budget_info(),
-            deadline_info=project.get_deadline_info(),
-            description=project.get_description(),
-            chapters_info=project.get_chapters_info(),
-            url=project.url,
-            published=utils.datetime_to_utc5_str(project.published),
+
+def get_subscribers(project: Project) -> list[int]:
+    if SUBSCRIPTION_MATCHER == 'sql':
+        return list(BotUserFilter.objects.matching(project))
+
+    return subscription_matcher.match(project)
+
+
+def record_delivery(delivery: Delivery, result, error):
+    now = timezone.now()
+    delivery.attempts += 1
+    delivery.updated = now
+    if error is None:
+        delivery.status = Delivery.Status.SENT
+        delivery.message_id = result.message_id
+        delivery.error = ''
+    else:
+        delivery.error = str(error)
+        # Other failures stay pending and are retried with the task, see
+        # TaskManager.fail
+        if is_permanent_error(error):
+            delivery.status = Delivery.Status.FAILED
+
+    Delivery.deliveries.filter(
+        id=delivery.id,
+        status=Delivery.Status.PENDING,
+    ).update(
+        status=delivery.status,
+        attempts=delivery.attempts,
+        message_id=delivery.message_id,
+        error=delivery.error,
+        updated=now,
+    )
+
+
+def send_project(bot: telebot.TeleBot, task: TaskManager):
+    project = task.project
+    project_info = utils.get_project_info(project)
+
+    def send(chat_id):
+        return media_cache.send_photo(
+            bot=bot,
+            chat_id=chat_id,
+            path=LOGO_IMAGE_PATH,
+            caption=project_info,
         )
 
+    Delivery.deliveries.bulk_create([
+        Delivery(project=project, chat_id=chat_id)
+        for chat_id in get_subscribers(project)
+    ], ignore_conflicts=True)
+
+    pending = Delivery.deliveries.filter(
+        project=project,
+        status=Delivery.Status.PENDING,
+    )
+    deliveries = {delivery.chat_id: delivery for delivery in pending.all()}
+
+    # Every row is saved as soon as its send returns, so a crash re-sends
+    # only the messages that were in flight.
+    def record(chat_id, result, error):
+        record_delivery(deliveries[chat_id], result, error)
+
+    chat_ids = list(deliveries)
+    report = DeliveryReport()
+    for start in range(0, len(chat_ids), DELIVERY_BATCH_SIZE):
+        # The lease covers a batch, not the whole project
+        if not task.renew(TASK_LEASE):
+            print(f'Project {project.id}: lease lost, {report}')
+            return None
+
+        delivery_engine.deliver(chat_ids[start:start+DELIVERY_BATCH_SIZE],
+                                send, report, record)
+
+    pending_count = pending.count()
+    print(f'Project {project.id}: {report}, {pending_count} pending')
+    return pending_count
+
+
+def run_task(bot: telebot.TeleBot, task: TaskManager):
+    # Tasks are claimed in bunches, so the later ones wait for the earlier
+    if not task.renew(TASK_LEASE):
+        return
+
+    try:
+        pending_count = 0
+        if task.type == TaskManager.Type.NEW_PROJECT:
+            pending_count = send_project(bot, task)
+    except Exception:
+        error = traceback.format_exc()
+        print(error)
+        task.fail(error)
+    else:
+        if pending_count is None:
+            return
 
-def send_project(bot: telebot.TeleBot, project: Project):
-    for user in BotUser.users.all():
-        if user.filter.is_valid_project(project) and user.filter.active:
-            try:
-                project_info = get_project_info(project)
-                with open(LOGO_IMAGE_PATH, 'rb') as photo:
-                    bot.send_photo(
-                        chat_id=user.chat_id,
-                        photo=photo,
-                        caption=project_info,
-                    )
-            except Exception:
-                pass
+        if pending_count:
+            task.fail(f'{pending_count} deliveries pending')
+        else:
+            task.complete()
 
 
 def main():
@@ -48,21 +138,21 @@ def main():
         parse_mode='HTML',
         num_threads=1,
     )
+    wakeup = TaskWakeup()
+    idle_timeout = IDLE_TIMEOUT_MIN
     while True:
-        if (task := TaskManager.unfulfilled.last()) is None:
-            time.sleep(5)
+        tasks = TaskManager.queue.claim(WORKER_ID, TASK_CLAIM_LIMIT,
+                                        TASK_LEASE)
+        if not tasks:
+            if wakeup.wait(idle_timeout):
+                idle_timeout = IDLE_TIMEOUT_MIN
+            else:
+                idle_timeout = min(idle_timeout * 2, IDLE_TIMEOUT_MAX)
             continue
 
-        try:
-            if task.type == TaskManager.Type.NEW_PROJECT:
-                project: Project = task.project
-                send_project(bot, project)
-            task.done = True
-        except Exception:
-            print(traceback.format_exc())   
-        finally:
-            task.save()
-            time.sleep(5)
+        idle_timeout = IDLE_TIMEOUT_MIN
+        for task in tasks:
+            run_task(bot, task)
 
 
 if __name__ == '__main__':
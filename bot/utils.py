@@ -4,6 +4,7 @@ import telebot
 from telebot import types
 
 from django.utils import timezone
+from django.core.cache import cache
 from django.core.paginator import Page
 
 from bs4 import BeautifulSoup
@@ -11,7 +12,11 @@ from bs4.element import NavigableString, Tag
 
 from bot import config
 from bot.call_types import CallTypes
-from backend.templates import Smiles
+from backend.models import Project, Template
+from backend.templates import Messages, Smiles
+
+
+PROJECT_INFO_CACHE_TIMEOUT = 60 * 60
 
 
 def seconds_to_time_str(seconds: int):
@@ -48,6 +53,34 @@ def datetime_to_utc5_str(dt) -> str:
     return (dt+timezone.timedelta(hours=5)).strftime('%d-%m-%Y, %H:%M')
 
 
+def render_project_info(project: Project, template: Template = None):
+    template = template or Messages.PROJECT
+    return template.text.format(
+            article=project.article,
+            title=project.title,
+            safe_deal_info=project.get_safe_deal_info(),
+            budget_info=project.get_budget_info(),
+            deadline_info=project.get_deadline_info(),
+            description=project.get_description(),
+            chapters_info=project.get_chapters_info(),
+            url=project.url,
+            published=datetime_to_utc5_str(project.published),
+        )
+
+
+def get_project_info(project: Project):
+    # Messages.PROJECT is loaded once at import, the current template is
+    # read so that edits in the admin change the key and the text.
+    template = Template.messages.get(pk=Messages.PROJECT.pk)
+    template_version = int(template.updated.timestamp() * 1000)
+    key = f'project_info:{project.id}:{template_version}'
+    return cache.get_or_set(
+        key,
+        lambda: render_project_info(project, template),
+        PROJECT_INFO_CACHE_TIMEOUT,
+    )
+
+
 def filter_tag(tag: Tag, ol_number=None):
     if isinstance(tag, NavigableString):
         text = tag
@@ -148,6 +181,38 @@ def make_page_keyboard(page: Page, CallType, **kwargs):
     return keyboard
 
 
+def make_keyset_keyboard(CallType, page_number: int, previous_kwargs=None,
+                         next_kwargs=None):
+    keyboard = types.InlineKeyboardMarkup(row_width=3)
+    buttons = []
+    if previous_kwargs is not None:
+        prev_page_button = make_inline_button(
+            text=f'{Smiles.PREVIOUS}',
+            CallType=CallType,
+            page=page_number - 1,
+            **previous_kwargs,
+        )
+        buttons.append(prev_page_button)
+
+    page_number_button = make_inline_button(
+        text=str(page_number),
+        CallType=CallTypes.Nothing,
+    )
+    buttons.append(page_number_button)
+
+    if next_kwargs is not None:
+        next_page_button = make_inline_button(
+            text=f'{Smiles.NEXT}',
+            CallType=CallType,
+            page=page_number + 1,
+            **next_kwargs,
+        )
+        buttons.append(next_page_button)
+
+    keyboard.add(*buttons)
+    return keyboard
+
+
 def make_inline_button(text, CallType, **kwargs):
     call_type = CallType(**kwargs)
     call_data = CallTypes.make_data(call_type)
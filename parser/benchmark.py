@@ -0,0 +1,212 @@
+import argparse
+import datetime
+import difflib
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+import requests
+from requests.adapters import BaseAdapter
+
+import http_client
+import utils
+
+
+# Synthetic pages written to the markup the parser expects, not recorded
+# from fl.ru; record real pages to compare the extractors, see README.md
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'fixtures')
+INDEX_FILE = 'index.json'
+GOLDEN_FILE = 'golden.json'
+# fl.ru redirects to www.fl.ru, neither may reach the network on replay
+REPLAY_URLS = ['https://fl.ru', 'https://www.fl.ru']
+
+
+def make_url(url, params=None):
+    return requests.Request('GET', url, params=params).prepare().url
+
+
+def load_index(directory):
+    with open(os.path.join(directory, INDEX_FILE)) as file:
+        return json.load(file)
+
+
+def project_to_dict(project: utils.Project):
+    data = project.__dict__.copy()
+    data['published'] = project.published.isoformat()
+    if project.deadline:
+        data['deadline'] = project.deadline.isoformat()
+    data['chapters'] = [list(chapter) for chapter in project.chapters]
+    return data
+
+
+class ReplayAdapter(BaseAdapter):
+    def __init__(self, directory, pages: dict):
+        super().__init__()
+        self.directory = directory
+        self.pages = pages
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.encoding = 'utf-8'
+        if (file_name := self.pages.get(request.url)) is None:
+            response.status_code = 404
+            response._content = b''
+            return response
+
+        with open(os.path.join(self.directory, file_name), 'rb') as file:
+            response._content = file.read()
+
+        response.status_code = 200
+        response.headers['Content-Type'] = 'text/html; charset=utf-8'
+        return response
+
+    def close(self):
+        pass
+
+
+class StageTimer():
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seconds = {}
+        self.calls = {}
+
+    def wrap(self, stage, function):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self.lock:
+                    self.seconds[stage] = self.seconds.get(stage, 0) + elapsed
+                    self.calls[stage] = self.calls.get(stage, 0) + 1
+
+        return wrapper
+
+    def report(self):
+        for stage, seconds in self.seconds.items():
+            calls = self.calls[stage]
+            print(f'  {stage:<8} {calls:>5} calls  {seconds:8.3f} s  '
+                  f'{seconds / calls * 1000:8.2f} ms/call')
+
+
+def record(directory, pages):
+    os.makedirs(directory, exist_ok=True)
+    index = {'pages': {}}
+    published = []
+
+    def save(url, params=None):
+        response = http_client.get(url, params)
+        response.raise_for_status()
+        file_name = f'{len(index["pages"]):04}.html'
+        with open(os.path.join(directory, file_name), 'w',
+                  encoding='utf-8') as file:
+            file.write(response.text)
+
+        index['pages'][make_url(url, params)] = file_name
+        return response.text
+
+    for page_number in range(1, pages+1):
+        params = {'kind': 1, 'page': page_number}
+        html = save(utils.PROJECTS_URL, params)
+        for project_url in utils.parse_project_urls(html):
+            article = utils.parse_project_article(project_url)
+            fields = utils.extract_project_fields(save(project_url), article)
+            published.append(utils.build_project(fields, project_url).published)
+
+    dt = min(published) + datetime.timedelta(seconds=1)
+    index['dt'] = dt.isoformat()
+    with open(os.path.join(directory, INDEX_FILE), 'w') as file:
+        json.dump(index, file, indent=2)
+
+    print(f'Recorded {len(index["pages"])} pages into {directory}')
+
+
+def run(directory, repeat, update_golden):
+    index = load_index(directory)
+    dt = datetime.datetime.fromisoformat(index['dt'])
+    adapter = ReplayAdapter(directory, index['pages'])
+    for url in REPLAY_URLS:
+        http_client.session.mount(url, adapter)
+
+    timer = StageTimer()
+    utils.get_html = timer.wrap('fetch', utils.get_html)
+    utils.parse_project_urls = timer.wrap('listing', utils.parse_project_urls)
+    utils.extract_project_fields = timer.wrap('parse',
+                                              utils.extract_project_fields)
+    utils.build_project = timer.wrap('extract', utils.build_project)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        projects = utils.get_last_projects_by_datetime(dt)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    fetched = timer.calls.get('fetch', 0)
+    print(f'Extractor: {utils.PROJECT_EXTRACTOR}, '
+          f'workers: {utils.FETCH_WORKERS}, repeat: {repeat}')
+    print(f'Projects: {len(projects)}, pages: {fetched}, '
+          f'{fetched / elapsed:.1f} pages/s, total {elapsed:.3f} s')
+    print(f'Peak memory: {peak / 1024 / 1024:.1f} MB')
+    print('Stages (wall time summed over workers):')
+    timer.report()
+
+    output = json.dumps([project_to_dict(project) for project in projects],
+                        ensure_ascii=False, indent=2)
+    golden_path = os.path.join(directory, GOLDEN_FILE)
+    if update_golden:
+        with open(golden_path, 'w', encoding='utf-8') as file:
+            file.write(output)
+        print(f'Golden output written to {golden_path}')
+        return True
+
+    if not os.path.exists(golden_path):
+        print(f'No golden output in {golden_path}, '
+              f'run with --update-golden to write it')
+        return False
+
+    with open(golden_path, encoding='utf-8') as file:
+        golden = file.read()
+
+    diff = list(difflib.unified_diff(golden.splitlines(), output.splitlines(),
+                                     'golden', 'output', lineterm=''))
+    if diff:
+        print('Golden output differs:')
+        print('\n'.join(diff))
+        return False
+
+    print('Golden output matches')
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Offline benchmark of the fl.ru parser')
+    parser.add_argument('command', choices=['record', 'run'])
+    parser.add_argument('--fixtures', default=FIXTURES_DIR)
+    parser.add_argument('--pages', type=int, default=2,
+                        help='listing pages to record')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=utils.FETCH_WORKERS)
+    parser.add_argument('--extractor', choices=list(utils.EXTRACTORS),
+                        default=utils.PROJECT_EXTRACTOR)
+    parser.add_argument('--update-golden', action='store_true')
+    args = parser.parse_args()
+
+    utils.FETCH_WORKERS = args.workers
+    utils.PROJECT_EXTRACTOR = args.extractor
+    if args.command == 'record':
+        record(args.fixtures, args.pages)
+    elif not run(args.fixtures, args.repeat, args.update_golden):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
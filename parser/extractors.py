@@ -0,0 +1,128 @@
+from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+
+
+SAFE_DEAL_TITLE = 'Оплата через Безопасную сделку'
+BUDGET_LABEL = 'Бюджет:'
+DEADLINE_LABEL = 'Дедлайн:'
+EXECUTOR_LABEL = 'Исполнитель определен:'
+PUBLISHED_LABEL = 'Опубликован:'
+CHAPTERS_LABEL = 'Разделы:'
+
+# How many nodes after the label string the value node is located.
+LABEL_VALUE_OFFSETS = {
+    BUDGET_LABEL: 1,
+    DEADLINE_LABEL: 1,
+    EXECUTOR_LABEL: 0,
+    PUBLISHED_LABEL: 2,
+    CHAPTERS_LABEL: 2,
+}
+LABEL_FIELDS = {
+    BUDGET_LABEL: 'budget',
+    DEADLINE_LABEL: 'deadline',
+    EXECUTOR_LABEL: 'executor',
+    PUBLISHED_LABEL: 'published',
+    CHAPTERS_LABEL: 'chapters',
+}
+
+
+def make_fields():
+    return {
+        'title': None,
+        'description': None,
+        'safe_deal': False,
+        'budget': None,
+        'deadline': None,
+        'executor': None,
+        'published': None,
+        'chapters': None,
+    }
+
+
+def soup_extract(html, article) -> dict:
+    soup = BeautifulSoup(html, 'lxml')
+    fields = make_fields()
+
+    if (title_tag := soup.find('h1', class_='b-page__title')):
+        fields['title'] = title_tag.text
+
+    if (description_tag := soup.find('div', id=f'projectp{article}')):
+        fields['description'] = description_tag.text
+
+    fields['safe_deal'] = bool(soup.find(title=SAFE_DEAL_TITLE))
+
+    for label, field in LABEL_FIELDS.items():
+        if not (node := soup.find(string=lambda text: label in text)):
+            continue
+
+        for _ in range(LABEL_VALUE_OFFSETS[label]):
+            node = node.next_element
+
+        fields[field] = node.text
+
+    return fields
+
+
+# Yields (element, text) pairs in BeautifulSoup's next_element order:
+# elements with text=None, then every string with the element it belongs to.
+def iter_nodes(root):
+    events = ('start', 'end', 'comment')
+    for event, node in etree.iterwalk(root, events=events):
+        if event == 'start':
+            yield node, None
+            if node.text:
+                yield node, node.text
+        elif event == 'comment':
+            if node.text:
+                yield node, node.text
+            if node.tail:
+                yield node, node.tail
+        elif node.tail:
+            yield node, node.tail
+
+
+def lxml_extract(html, article) -> dict:
+    root = lxml_html.document_fromstring(html)
+    fields = make_fields()
+    description_id = f'projectp{article}'
+    labels = list(LABEL_FIELDS)
+    captures = []
+
+    for node, text in iter_nodes(root):
+        if captures:
+            for capture in captures:
+                capture[0] -= 1
+                if not capture[0]:
+                    value = node.text_content() if text is None else text
+                    fields[capture[1]] = value
+
+            captures = [capture for capture in captures if capture[0]]
+
+        if text is None:
+            if node.tag == 'h1' and fields['title'] is None:
+                if 'b-page__title' in node.get('class', '').split():
+                    fields['title'] = node.text_content()
+            elif node.tag == 'div' and fields['description'] is None:
+                if node.get('id') == description_id:
+                    fields['description'] = node.text_content()
+
+            if node.get('title') == SAFE_DEAL_TITLE:
+                fields['safe_deal'] = True
+
+            continue
+
+        for label in labels[:]:
+            if label in text:
+                labels.remove(label)
+                if (offset := LABEL_VALUE_OFFSETS[label]):
+                    captures.append([offset, LABEL_FIELDS[label]])
+                else:
+                    fields[LABEL_FIELDS[label]] = text
+
+    return fields
+
+
+EXTRACTORS = {
+    'soup': soup_extract,
+    'lxml': lxml_extract,
+}
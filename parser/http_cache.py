@@ -0,0 +1,85 @@
+import gzip
+import hashlib
+import json
+import os
+
+import requests
+
+import http_client
+
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+
+
+def make_digest(text: str) -> str:
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+class HttpCache():
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index.json')
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_path) as file:
+                self.entries = json.load(file)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = self.index_path + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(self.entries, file)
+
+        os.replace(temp_path, self.index_path)
+
+    def get_body_path(self, key):
+        name = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.directory, f'{name}.html.gz')
+
+    def read_body(self, key):
+        try:
+            with gzip.open(self.get_body_path(key), 'rt') as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def write_body(self, key, text):
+        os.makedirs(self.directory, exist_ok=True)
+        with gzip.open(self.get_body_path(key), 'wt') as file:
+            file.write(text)
+
+    def get(self, url, params=None) -> tuple[str, bool]:
+        key = requests.Request('GET', url, params=params).prepare().url
+        entry = self.entries.get(key)
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        response = http_client.get(url, params, headers)
+        if response.status_code == 304:
+            if (text := self.read_body(key)) is not None:
+                return text, False
+
+            response = http_client.get(url, params)
+
+        if not response.ok:
+            return None, False
+
+        text = response.text
+        digest = make_digest(text)
+        changed = not entry or entry['digest'] != digest
+        if changed:
+            self.write_body(key, text)
+
+        self.entries[key] = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'digest': digest,
+        }
+        return text, changed
@@ -0,0 +1,107 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 20
+MAX_RETRIES = 3
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+POOL_SIZE = 16
+MAX_CONNECTIONS_PER_HOST = 4
+HEADERS = {
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+
+class HttpStats():
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def add(self, seconds: float, size: int, error=False):
+        with self.lock:
+            self.requests += 1
+            self.errors += error
+            self.bytes += size
+            self.seconds += seconds
+
+    def pop(self) -> str:
+        with self.lock:
+            text = str(self)
+            self.reset()
+            return text
+
+    def __str__(self):
+        average = self.seconds / self.requests if self.requests else 0
+        return (f'{self.requests} requests, {self.errors} errors, '
+                f'{self.bytes // 1024} KB, '
+                f'avg latency {average * 1000:.0f} ms')
+
+
+def make_session() -> requests.Session:
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=POOL_SIZE,
+        pool_maxsize=POOL_SIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+session = make_session()
+stats = HttpStats()
+host_semaphores = {}
+host_semaphores_lock = threading.Lock()
+
+
+def get_host_semaphore(url):
+    host = urlparse(url).netloc
+    with host_semaphores_lock:
+        if host not in host_semaphores:
+            semaphore = threading.BoundedSemaphore(MAX_CONNECTIONS_PER_HOST)
+            host_semaphores[host] = semaphore
+
+        return host_semaphores[host]
+
+
+def get(url, params=None, headers=None) -> requests.Response:
+    start = time.perf_counter()
+    try:
+        with get_host_semaphore(url):
+            response = session.get(
+                url,
+                params=params,
+                headers=headers,
+                timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+            )
+    except requests.RequestException:
+        stats.add(time.perf_counter() - start, 0, error=True)
+        raise
+
+    stats.add(time.perf_counter() - start, len(response.content),
+              error=not response.ok)
+    return response
@@ -3,56 +3,123 @@ import datetime
 import traceback
 
 import pytz
+from django.db import transaction
+from django.db.models import Max
 
 import config
+import http_client
+from http_cache import HttpCache
 
+from backend.chapters import chapter_registry
 from backend.models import Project as ProjectDB
-from backend.models import Chapter as ChapterDB
+from backend.models import ArchivedProject, TaskManager
+from backend.wakeup import notify_tasks
 
-from utils import get_last_projects_by_datetime, Project
+from utils import (get_last_projects_by_datetime, KnownArticles,
+                   KNOWN_ARTICLES_LIMIT, Project)
 
 
 def get_last_update_datetime():
-    project = ProjectDB.projects.first()
+    published = ProjectDB.projects.aggregate(
+        published=Max('published'),
+    )['published']
     utc = pytz.UTC
     tz = pytz.timezone('Asia/Tashkent')
-    if not project:
+    if not published:
         dt = datetime.datetime.now()
         dt -= datetime.timedelta(minutes=50)
         return tz.localize(dt)
 
-    return tz.normalize(project.published.replace(tzinfo=utc))
+    return tz.normalize(published.replace(tzinfo=utc))
 
 
-def migrate_to_db(new_projects: list[Project]):
-    for project in sorted(new_projects, key=lambda project: project.published):
-        if ProjectDB.projects.filter(article=project.article).exists():
-            continue
+# Archived projects are known too: raised ones show up in the listing again
+KNOWN_MODELS = [ProjectDB, ArchivedProject]
+
 
-        kwargs = project.__dict__.copy()
-        kwargs.pop('chapters')
-        project_db = ProjectDB.projects.create(**kwargs)
+def load_known_articles() -> KnownArticles:
+    articles = []
+    for Model in KNOWN_MODELS:
+        articles += Model.projects.order_by('-published').values_list(
+            'published', 'article',
+        )[:KNOWN_ARTICLES_LIMIT]
 
-        for parent, child in project.chapters:
-            chapter_db, success = ChapterDB.chapters.get_or_create(name=child)
-            if success:
-                parent, _ = ChapterDB.chapters.get_or_create(name=parent)
-                chapter_db.parent = parent
-                chapter_db.save()
+    articles = sorted(articles, reverse=True)[:KNOWN_ARTICLES_LIMIT]
+    return KnownArticles(article for _, article in reversed(articles))
 
-            project_db.chapters.add(chapter_db.parent)
-            project_db.chapters.add(chapter_db)
+
+def migrate_to_db(new_projects: list[Project]):
+    articles = {int(project.article) for project in new_projects}
+    existing_articles = set()
+    for Model in KNOWN_MODELS:
+        existing_articles.update(Model.projects.filter(
+            article__in=articles,
+        ).values_list('article', flat=True))
+
+    projects = {}
+    for project in sorted(new_projects, key=lambda project: project.published):
+        article = int(project.article)
+        if article not in existing_articles and article not in projects:
+            projects[article] = project
+
+    if not projects:
+        return
+
+    with transaction.atomic():
+        projects_db = []
+        for project in projects.values():
+            kwargs = project.__dict__.copy()
+            kwargs.pop('chapters')
+            projects_db.append(ProjectDB(**kwargs))
+
+        ProjectDB.projects.bulk_create(projects_db)
+        project_ids = dict(ProjectDB.projects.filter(
+            article__in=projects,
+        ).values_list('article', 'id'))
+
+        project_chapters = set()
+        for article, project in projects.items():
+            for parent, child in project.chapters:
+                chapter = chapter_registry.get_or_create(parent, child)
+                for chapter_id in (chapter.parent_id, chapter.id):
+                    if chapter_id is not None:
+                        project_chapters.add((project_ids[article],
+                                              chapter_id))
+
+        ProjectChapter = ProjectDB.chapters.through
+        ProjectChapter.objects.bulk_create([
+            ProjectChapter(project_id=project_id, chapter_id=chapter_id)
+            for project_id, chapter_id in project_chapters
+        ])
+        TaskManager.tasks.bulk_create([
+            TaskManager(
+                type=TaskManager.Type.NEW_PROJECT,
+                project_id=project_ids[article],
+            )
+            for article in projects
+        ])
+
+    notify_tasks()
 
 
 def main():
+    known_articles = load_known_articles()
+    http_cache = HttpCache()
     while True:
         try:
             last_update_datetime = get_last_update_datetime()
-            projects = get_last_projects_by_datetime(last_update_datetime)
+            projects = get_last_projects_by_datetime(last_update_datetime,
+                                                     known_articles,
+                                                     http_cache)
             migrate_to_db(projects)
+            known_articles.update(project.article for project in projects)
+            http_cache.save()
         except Exception:
+            http_cache.load()
+            chapter_registry.invalidate()
             traceback.print_exc()
         finally:
+            print(datetime.datetime.now(), http_client.stats.pop())
             time.sleep(60)
 
 
@@ -1,15 +1,21 @@
 import datetime
-import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
 
 import pytz
-import requests
 from bs4 import BeautifulSoup
 
+import http_client
+from extractors import EXTRACTORS
+
 
 BASE_URL = 'https://fl.ru'
 PROJECTS_URL = urljoin(BASE_URL, 'projects')
 MAX_PARSE_PAGE_NUMBER = 50
+PROJECT_EXTRACTOR = 'soup'
+FETCH_WORKERS = 8
+KNOWN_ARTICLES_LIMIT = 5000
 
 
 class Project():
@@ -34,8 +40,32 @@ class Project():
         return self.title
 
 
+class KnownArticles():
+    def __init__(self, articles=(), maxlen=KNOWN_ARTICLES_LIMIT):
+        self.maxlen = maxlen
+        self.articles = OrderedDict()
+        self.update(articles)
+
+    def add(self, article):
+        article = int(article)
+        self.articles[article] = None
+        self.articles.move_to_end(article)
+        while len(self.articles) > self.maxlen:
+            self.articles.popitem(last=False)
+
+    def update(self, articles):
+        for article in articles:
+            self.add(article)
+
+    def __contains__(self, article):
+        return int(article) in self.articles
+
+    def __len__(self):
+        return len(self.articles)
+
+
 def get_html(url, params=None):
-    response = requests.get(url, params)
+    response = http_client.get(url, params)
     if response.ok:
         return response.text
 
@@ -86,74 +116,121 @@ def parse_project_chapters(text: str):
     return chapters
 
 
-def get_project(project_url):
-    html = get_html(project_url)
-    soup = BeautifulSoup(html, 'lxml')
+def extract_project_fields(html, article) -> dict:
+    return EXTRACTORS[PROJECT_EXTRACTOR](html, article)
 
+
+def build_project(fields: dict, project_url) -> Project:
     project = Project()
     project.article = parse_project_article(project_url)
     project.url = project_url
+    project.title = fields['title'].strip()
+    project.description = fields['description'].strip()
+    project.safe_deal = fields['safe_deal']
+    project.budget = parse_project_budget(fields['budget'].strip())
 
-    title_tag = soup.find('h1', class_='b-page__title')
-    project.title = title_tag.text.strip()
+    if fields['deadline'] is not None:
+        project.deadline = text_to_date(fields['deadline'].strip())
 
-    description_tag = soup.find('div', id=f'projectp{project.article}')
-    project.description = description_tag.text.strip()
+    project.without_executor = fields['executor'] is None
 
-    if soup.find(title='Оплата через Безопасную сделку'):
-        project.safe_deal = True
+    if fields['published'] is not None:
+        published = parse_project_published(fields['published'].strip())
+        tz = pytz.timezone('Asia/Tashkent')
+        project.published = tz.localize(published)
 
-    budget_tag = soup.find(string=re.compile('Бюджет:')).next_element
-    project.budget = parse_project_budget(budget_tag.text.strip())
+    if fields['chapters'] is not None:
+        for parent, child in parse_project_chapters(fields['chapters']):
+            project.chapters.append((parent, child))
 
-    if (deadline_string := soup.find(string=re.compile('Дедлайн:'))):
-        deadline_tag = deadline_string.next_element
-        project.deadline = text_to_date(deadline_tag.text.strip())
+    return project
 
-    if soup.find(string=re.compile('Исполнитель определен:')):
-        project.without_executor = False
-    else:
-        project.without_executor = True
 
-    if (published_string := soup.find(string=re.compile('Опубликован:'))):
-        published_tag = published_string.next_element.next_element
-        project.published = parse_project_published(published_tag.text.strip())
-        tz = pytz.timezone('Asia/Tashkent')
-        project.published = tz.localize(project.published)
+def get_project(project_url):
+    html = get_html(project_url)
+    article = parse_project_article(project_url)
+    fields = extract_project_fields(html, article)
+    return build_project(fields, project_url)
 
-    if (chapters_string := soup.find(string=re.compile('Разделы:'))):
-        chapters_tag = chapters_string.next_element.next_element
-        for parent, child in parse_project_chapters(chapters_tag.text):
-            project.chapters.append((parent, child))
 
-    return project
+def get_projects(project_urls: list[str], workers=None) -> list[Project]:
+    workers = workers or FETCH_WORKERS
+    if workers <= 1 or len(project_urls) <= 1:
+        return list(map(get_project, project_urls))
 
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(get_project, project_urls))
 
-def parse_projects_by_datetime(html, dt: datetime.datetime) \
-                               -> tuple[list[Project], bool]:
+
+def parse_project_urls(html) -> list[str]:
     soup = BeautifulSoup(html, 'lxml')
-    projects = []
+    project_urls = []
     for project_tag in soup.find_all(class_='b-post'):
         if 'topprjpay' in project_tag.get('class'):
             continue
 
         a_tag = project_tag.find('a', class_='b-post__link')
-        project_url = urljoin(BASE_URL, a_tag.get('href'))
-        project = get_project(project_url)
-        if project.published < dt:
+        project_urls.append(urljoin(BASE_URL, a_tag.get('href')))
+
+    return project_urls
+
+
+def skip_known_project_urls(project_urls: list[str],
+                            known_articles: KnownArticles) -> list[str]:
+    return [project_url for project_url in project_urls
+            if parse_project_article(project_url) not in known_articles]
+
+
+def parse_projects_by_datetime(html, dt: datetime.datetime,
+                               known_articles: KnownArticles = None) \
+                               -> tuple[list[Project], bool]:
+    projects = []
+    project_urls = parse_project_urls(html)
+    if known_articles is not None:
+        new_project_urls = skip_known_project_urls(project_urls,
+                                                   known_articles)
+        # Raised and paid projects list known ones above new ones, so
+        # only a page with nothing new ends the walk.
+        if project_urls and not new_project_urls:
             return projects, True
 
-        projects.append(project)
+        project_urls = new_project_urls
+
+    for start in range(0, len(project_urls), FETCH_WORKERS):
+        chunk_urls = project_urls[start:start+FETCH_WORKERS]
+        for project in get_projects(chunk_urls):
+            if project.published < dt:
+                return projects, True
+
+            projects.append(project)
 
     return projects, False
 
 
-def get_last_projects_by_datetime(dt: datetime) -> list[Project]:
+def get_projects_page_html(page_number, http_cache=None) -> tuple[str, bool]:
+    params = {'kind': 1, 'page': page_number}
+    if http_cache is None:
+        return get_html(PROJECTS_URL, params), True
+
+    return http_cache.get(PROJECTS_URL, params)
+
+
+def get_last_projects_by_datetime(dt: datetime,
+                                  known_articles: KnownArticles = None,
+                                  http_cache=None) -> list[Project]:
     projects = []
     for page_number in range(1, MAX_PARSE_PAGE_NUMBER+1):
-        params = {'kind': 1, 'page': page_number}
-        html = get_html(PROJECTS_URL, params)
-        new_projects, stop = parse_projects_by_datetime(html, dt)
+        html, changed = get_projects_page_html(page_number, http_cache)
+        if page_number == 1 and (html is None or not changed):
+            break
+
+        # Projects past a failed page would be lost once the pages before
+        # it are saved, so the whole cycle fails and is retried.
+        if html is None:
+            raise RuntimeError(f'Listing page {page_number} failed to load')
+
+        new_projects, stop = parse_projects_by_datetime(html, dt,
+                                                        known_articles)
         projects.extend(new_projects)
         if stop:
             break
@@ -163,27 +240,21 @@ def get_last_projects_by_datetime(dt: datetime) -> list[Project]:
 
 def parse_projects_by_count(html, count) \
                                -> tuple[list[Project], bool]:
-    soup = BeautifulSoup(html, 'lxml')
-    projects = []
-    for project_tag in soup.find_all(class_='b-post'):
-        if 'topprjpay' in project_tag.get('class'):
-            continue
-
-        a_tag = project_tag.find('a', class_='b-post__link')
-        project_url = urljoin(BASE_URL, a_tag.get('href'))
-        project = get_project(project_url)
-        projects.append(project)
-        if len(projects) == count:
-            return projects, True
-
-    return projects, False
+    project_urls = parse_project_urls(html)
+    projects = get_projects(project_urls[:count])
+    return projects, len(projects) == count
 
 
 def get_last_projects_by_count(count=1) -> list[Project]:
     projects = []
     for page_number in range(1, MAX_PARSE_PAGE_NUMBER+1):
         params = {'kind': 1, 'page': page_number}
-        html = get_html(PROJECTS_URL, params)
+        if (html := get_html(PROJECTS_URL, params)) is None:
+            if page_number == 1:
+                break
+
+            raise RuntimeError(f'Listing page {page_number} failed to load')
+
         new_projects, stop = parse_projects_by_count(html, count-len(projects))
         if stop:
             break